@@ -1,19 +1,32 @@
 import tkinter as tk
-from tkinter import messagebox, ttk
+from tkinter import filedialog, messagebox, ttk
 from datetime import datetime
+import csv
+import itertools
+import time
 import tkinter.font as font  # Import the font module
+from attendance_analytics import AttendanceAnalytics
+from attendance_engine import AttendanceRegister
+from attendance_store import AttendanceStore
 
 class AttendanceRegisterGUI:
     SCHOOL_NAME = "INES RUHENGELI"
     DEPARTMENT = "Department of Computer Science, SWE"
     OPTION = "Agile Software Development "
     LECTURER = "Lecturer: Dr. NTEZIRIZA NKERABAHIZI Josbert"
-    CURRENT_DATE = "Date: " + str(datetime.now().date())
+    SESSION_DATE = str(datetime.now().date())
+    SESSION = OPTION.strip()  # Marks are kept per date and per course session
+    CURRENT_DATE = "Date: " + SESSION_DATE
+    IMPORT_CHUNK = 500  # Roster rows inserted per scheduled import step
+    WINDOWED_THRESHOLD = 5000  # Rosters larger than this only keep the visible rows in the table
+    PAGE_BUFFER = 1  # Extra row kept below the page in windowed mode to fill a partly visible last line
+    AT_RISK_THRESHOLD = 0.75  # Attendance rate below which a student is reported at risk
 
     def __init__(self, master):
         self.master = master
         master.title("Attendance Register PRINCE")
         master.configure(bg='green')
+        master.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # Define font style
         title_font = font.Font(size=20, weight='bold')
@@ -36,13 +49,22 @@ class AttendanceRegisterGUI:
         tk.Label(header_frame, text=self.LECTURER, bg='green', fg='white', font=label_font).pack()
 
         # Create the table
-        self.table = ttk.Treeview(master, columns=("No.", "Student No.", "First Name", "Surname", "Present"), show='headings')
+        table_frame = tk.Frame(master, bg='green')
+        table_frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+
+        self.table = ttk.Treeview(table_frame, columns=("No.", "Student No.", "First Name", "Surname", "Present"), show='headings')
         self.table.heading("No.", text="No.")
         self.table.heading("Student No.", text="Student No.")
         self.table.heading("First Name", text="First Name")
         self.table.heading("Surname", text="Surname")
         self.table.heading("Present", text="Present")
-        self.table.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.table.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.table.bind("<Configure>", self.on_resize)
+        self.table.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.table.bind("<Button-4>", self.on_mouse_wheel)
+        self.table.bind("<Button-5>", self.on_mouse_wheel)
 
         # Create a panel for input
         input_frame = tk.Frame(master, bg='green')
@@ -73,10 +95,32 @@ class AttendanceRegisterGUI:
         self.delete_student_button = tk.Button(button_frame, text="Delete Student", command=self.delete_student, bg='blue', fg='white')
         self.delete_student_button.pack(side=tk.LEFT)
 
-        # Populate the table with sample data
-        self.students = self.get_sample_students()
-        for student in self.students:
-            self.table.insert("", "end", values=(student['no'], student['student_no'], student['first_name'], student['surname'], 0))
+        self.import_roster_button = tk.Button(button_frame, text="Import Roster", command=self.choose_roster_file, bg='blue', fg='white')
+        self.import_roster_button.pack(side=tk.LEFT)
+
+        self.find_student_button = tk.Button(button_frame, text="Find Student", command=self.jump_to_student, bg='blue', fg='white')
+        self.find_student_button.pack(side=tk.LEFT)
+
+        self.mark_scans_button = tk.Button(button_frame, text="Mark From Scans", command=self.choose_scan_file, bg='blue', fg='white')
+        self.mark_scans_button.pack(side=tk.LEFT)
+
+        self.report_button = tk.Button(button_frame, text="Attendance Report", command=self.show_report, bg='blue', fg='white')
+        self.report_button.pack(side=tk.LEFT)
+
+        # Load the saved register, seeding it with sample data on first run
+        store = AttendanceStore()
+        self.analytics = AttendanceAnalytics(store)
+        self.register = AttendanceRegister(store, self.SESSION_DATE, self.SESSION, self.analytics)
+        if not self.register.students:
+            self.register.add_students((s['student_no'], s['first_name'], s['surname']) for s in self.get_sample_students())
+        self.students = self.register.students  # The view renders the register's own list
+
+        # Populate the table
+        self.view_start = 0  # Roster position of the first row shown in windowed mode
+        self.page_size = int(self.table.cget("height"))  # Rows the table shows; updated once it is laid out
+        self.view_rows = []  # Treeview items reused for the window in windowed mode
+        self.visible = []  # Student records currently shown in windowed mode
+        self.set_windowed(len(self.students) > self.WINDOWED_THRESHOLD)
 
     def get_sample_students(self):
         return [
@@ -95,18 +139,15 @@ class AttendanceRegisterGUI:
             # ... more students
         ]
 
-    def find_student_row(self, student_no):
-        for i, student in enumerate(self.students):
-            if student['student_no'] == student_no:
-                return i
-        return -1
+    def find_student(self, student_no):
+        # Constant-time lookup through the register's student index, None if not on the roster
+        return self.register.find_student(student_no)
 
     def mark_attendance(self):
         try:
-            student_no = int(self.student_no_field.get())
-            row = self.find_student_row(student_no)
-            if row >= 0:
-                self.table.item(self.table.get_children()[row], values=(self.students[row]['no'], student_no, self.students[row]['first_name'], self.students[row]['surname'], 1))
+            student = self.register.mark(int(self.student_no_field.get()))
+            if student is not None:
+                self.refresh_rows([student])
             else:
                 messagebox.showerror("Error", "Student not found.")
         except ValueError:
@@ -118,10 +159,9 @@ class AttendanceRegisterGUI:
             first_name = self.first_name_field.get().strip()
             surname = self.surname_field.get().strip()
 
-            if first_name and surname and self.find_student_row(new_student_no) == -1:
-                new_row = len(self.students) + 1
-                self.students.append({'no': new_row, 'student_no': new_student_no, 'first_name': first_name, 'surname': surname})
-                self.table.insert("", "end", values=(new_row, new_student_no, first_name, surname, 0))
+            added = self.register.add_students([(new_student_no, first_name, surname)]) if first_name and surname else []
+            if added:
+                self.show_added(added)
                 messagebox.showinfo("Success", "Student added successfully.")
             else:
                 messagebox.showerror("Error", "Invalid input or student number already exists.")
@@ -130,22 +170,229 @@ class AttendanceRegisterGUI:
 
     def delete_student(self):
         try:
-            student_no_to_delete = int(self.student_no_field.get())
-            row = self.find_student_row(student_no_to_delete)
-            if row >= 0:
-                self.table.delete(self.table.get_children()[row])
-                del self.students[row]
-                self.update_student_numbers()
+            student = self.find_student(int(self.student_no_field.get()))
+            if student is not None:
+                row = self.register.delete_student(student['student_no'])
+                if self.windowed:
+                    self.render_window()
+                else:
+                    self.table.delete(student['iid'])
+                    self.update_student_numbers(row)
                 messagebox.showinfo("Success", "Student deleted successfully.")
             else:
                 messagebox.showerror("Error", "Student not found.")
         except ValueError:
             messagebox.showerror("Error", "Please enter a valid student number.")
 
-    def update_student_numbers(self):
-        for index, student in enumerate(self.students):
-            student['no'] = index + 1
-            self.table.item(self.table.get_children()[index], values=(student['no'], student['student_no'], student['first_name'], student['surname'], student.get('present', 0)))
+    def update_student_numbers(self, start=0):
+        # The register already renumbered the rows from 'start' onwards; only their "No." cell is rewritten
+        for index in range(start, len(self.students)):
+            student = self.students[index]
+            self.table.set(student['iid'], "No.", student['no'])
+
+    def refresh_rows(self, students):
+        # In windowed mode only visible rows have an item to update
+        for student in students:
+            if student['iid'] is not None:
+                self.table.item(student['iid'], values=self.row_values(student))
+
+    def show_added(self, students):
+        # Newly added students go at the end of the roster
+        if self.windowed:
+            self.render_window()
+        else:
+            for student in students:
+                student['iid'] = self.table.insert("", "end", values=self.row_values(student))
+
+    def choose_scan_file(self):
+        path = filedialog.askopenfilename(title="Select a scanner file", filetypes=[("Text files", "*.txt *.csv"), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            hits, misses = self.register.mark_scan_file(path)
+        except (OSError, UnicodeDecodeError) as e:
+            messagebox.showerror("Error", f"Could not read scans: {e}")
+            return
+        self.refresh_rows(hits)
+        message = f"Marked present: {len(hits)}\nNot found: {len(misses)}"
+        if misses:
+            message += "\n" + ", ".join(str(m) for m in misses[:20]) + (" ..." if len(misses) > 20 else "")
+        messagebox.showinfo("Scans Applied", message)
+
+    def row_values(self, student):
+        return (student['no'], student['student_no'], student['first_name'], student['surname'], student['present'])
+
+    def set_windowed(self, windowed):
+        # Switch between holding every student in the table and holding only a window of them
+        self.windowed = windowed
+        self.table.delete(*self.table.get_children())
+        for student in self.students:
+            student['iid'] = None
+        self.view_rows = []
+        self.visible = []
+        if windowed:
+            self.table.configure(yscrollcommand="")
+            self.scrollbar.configure(command=self.scroll_window)
+            self.render_window()
+        else:
+            self.table.configure(yscrollcommand=self.scrollbar.set)
+            self.scrollbar.configure(command=self.table.yview)
+            for student in self.students:
+                student['iid'] = self.table.insert("", "end", values=self.row_values(student))
+
+    def render_window(self):
+        # Show the page starting at view_start by rewriting a fixed pool of Treeview items
+        self.view_start = min(max(self.view_start, 0), max(len(self.students) - self.page_size, 0))
+        window = self.students[self.view_start:self.view_start + self.page_size + self.PAGE_BUFFER]
+
+        for student in self.visible:
+            student['iid'] = None
+        while len(self.view_rows) < len(window):
+            self.view_rows.append(self.table.insert("", "end"))
+        if len(self.view_rows) > len(window):
+            self.table.delete(*self.view_rows[len(window):])
+            del self.view_rows[len(window):]
+
+        for iid, student in zip(self.view_rows, window):
+            student['iid'] = iid
+            self.table.item(iid, values=self.row_values(student))
+        self.visible = window
+
+        self.table.selection_remove(self.table.selection())
+        self.table.yview_moveto(0)
+        total = len(self.students) or 1
+        self.scrollbar.set(self.view_start / total, min((self.view_start + self.page_size) / total, 1))
+
+    def scroll_window(self, action, amount, unit=None):
+        # Scrollbar command in windowed mode: ("moveto", fraction) or ("scroll", n, "units"/"pages")
+        if action == "moveto":
+            self.view_start = int(float(amount) * len(self.students))
+        elif unit == "pages":
+            self.view_start += int(amount) * self.page_size
+        else:
+            self.view_start += int(amount)
+        self.render_window()
+
+    def on_resize(self, event):
+        # Fit the page to the rows the table can show, measured from a drawn row when there is one
+        bbox = self.table.bbox(self.view_rows[0]) if self.view_rows else ""
+        if bbox:
+            top, row_height = bbox[1], bbox[3]
+        else:
+            row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 0) or font.nametofont("TkDefaultFont").metrics("linespace") + 2
+            top = row_height  # The heading row
+        page_size = max((event.height - top) // row_height, 1)
+        if page_size != self.page_size:
+            self.page_size = page_size
+            if self.windowed:
+                self.render_window()
+
+    def on_mouse_wheel(self, event):
+        if not self.windowed:
+            return None
+        if event.num == 4 or event.delta > 0:
+            self.scroll_window("scroll", -3, "units")
+        else:
+            self.scroll_window("scroll", 3, "units")
+        return "break"
+
+    def jump_to_student(self):
+        try:
+            student = self.find_student(int(self.student_no_field.get()))
+            if student is None:
+                messagebox.showerror("Error", "Student not found.")
+                return
+            if self.windowed:
+                # The page now holds the student; see() would scroll the table away from the scrollbar
+                self.view_start = student['no'] - 1 - self.page_size // 2
+                self.render_window()
+            else:
+                self.table.see(student['iid'])
+            self.table.selection_set(student['iid'])
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a valid student number.")
+
+    def choose_roster_file(self):
+        path = filedialog.askopenfilename(title="Select a roster CSV", filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if path:
+            self.import_roster(path)
+
+    def import_roster(self, path):
+        # Stream the CSV (Student No., First Name, Surname) and insert it a chunk at a time
+        # so the window keeps responding while a large intake is loaded
+        try:
+            file = open(path, newline="", encoding="utf-8-sig")
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not open roster: {e}")
+            return
+        stats = {'added': 0, 'duplicates': 0, 'invalid': 0, 'started': time.perf_counter()}
+        self.import_roster_button.config(state=tk.DISABLED)
+        self.master.after(0, self.import_roster_chunk, file, csv.reader(file), stats)
+
+    def import_roster_chunk(self, file, rows, stats):
+        batch = []
+        read = 0
+        error = None
+        if not self.windowed and len(self.students) + self.IMPORT_CHUNK > self.WINDOWED_THRESHOLD:
+            self.set_windowed(True)
+        try:
+            for row in itertools.islice(rows, self.IMPORT_CHUNK):
+                read += 1
+                try:
+                    student_no = int(row[0])
+                    first_name = row[1].strip()
+                    surname = row[2].strip()
+                except (IndexError, ValueError):
+                    if rows.line_num > 1:  # A non-numeric first line is the header
+                        stats['invalid'] += 1
+                    continue
+                if not first_name or not surname:
+                    stats['invalid'] += 1
+                    continue
+                batch.append((student_no, first_name, surname))
+        except (csv.Error, UnicodeDecodeError) as e:
+            error = e
+
+        # The register skips numbers already on the roster, including repeats within this chunk
+        added = self.register.add_students(batch)
+        stats['added'] += len(added)
+        stats['duplicates'] += len(batch) - len(added)
+        self.show_added(added)
+
+        if error is None and read == self.IMPORT_CHUNK:
+            self.master.after(1, self.import_roster_chunk, file, rows, stats)
+            return
+
+        file.close()
+        self.import_roster_button.config(state=tk.NORMAL)
+        if error is not None:
+            messagebox.showerror("Error", f"Import stopped at line {rows.line_num}: {error}\nAdded: {stats['added']}")
+            return
+        elapsed = time.perf_counter() - stats['started']
+        rate = stats['added'] / elapsed if elapsed > 0 else 0
+        messagebox.showinfo("Import Complete",
+                            f"Added: {stats['added']}\nDuplicates skipped: {stats['duplicates']}\n"
+                            f"Invalid rows skipped: {stats['invalid']}\n"
+                            f"Time: {elapsed:.2f} s ({rate:,.0f} rows/sec)")
+
+    def show_report(self):
+        # Served from the analytics counters, so this costs the same however many sessions are stored
+        at_risk = self.analytics.at_risk((s['student_no'] for s in self.students), self.AT_RISK_THRESHOLD)
+        today = self.analytics.session_totals.get(self.register.store.session_key(self.SESSION_DATE, self.SESSION), 0)
+        message = (f"Sessions recorded: {self.analytics.sessions_held()}\n"
+                   f"Present today: {today} of {len(self.students)}\n"
+                   f"At risk (below {self.AT_RISK_THRESHOLD:.0%}): {len(at_risk)}")
+        for student_no, rate in at_risk[:15]:
+            student = self.find_student(student_no)
+            message += f"\n  {student_no} {student['first_name']} {student['surname']}: {rate:.0%}"
+        if len(at_risk) > 15:
+            message += "\n  ..."
+        messagebox.showinfo("Attendance Report", message)
+
+    def on_close(self):
+        # Snapshot the register so the next start only replays what is new
+        self.register.close()
+        self.master.destroy()
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,71 @@
+import numpy as np
+
+
+class AttendanceAnalytics:
+    """Attendance rates, session totals and at-risk lists kept up to date as marks come in.
+
+    Counters are built once from the store and then bumped by add_mark, so
+    reports never rescan the sessions. recompute() rebuilds everything from a
+    NumPy student x session matrix when a full pass is wanted.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.session_totals = {}  # "date|session" -> students marked present
+        self.student_totals = {}  # student_no -> sessions attended
+        for key, present in store.sessions.items():
+            self.session_totals[key] = len(present)
+            for student_no in present:
+                self.student_totals[student_no] = self.student_totals.get(student_no, 0) + 1
+
+    def add_mark(self, date, session, student_no):
+        # Called once for each new mark, never for a repeated one
+        key = self.store.session_key(date, session)
+        self.session_totals[key] = self.session_totals.get(key, 0) + 1
+        self.student_totals[student_no] = self.student_totals.get(student_no, 0) + 1
+
+    def sessions_held(self):
+        return len(self.session_totals)
+
+    def attendance_rate(self, student_no):
+        held = len(self.session_totals)
+        return self.student_totals.get(student_no, 0) / held if held else 0.0
+
+    def at_risk(self, student_nos, threshold=0.75):
+        """(student_no, rate) for every listed student below the threshold, lowest rate first."""
+        held = len(self.session_totals)
+        if not held:
+            return []
+        rates = ((student_no, self.student_totals.get(student_no, 0) / held) for student_no in student_nos)
+        return sorted((item for item in rates if item[1] < threshold), key=lambda item: item[1])
+
+    def matrix(self, student_nos):
+        """Boolean student x session matrix over the listed students and anyone marked in a session.
+
+        Returns (matrix, student numbers for the rows, session keys for the columns).
+        """
+        rows = list(student_nos)
+        position = {student_no: i for i, student_no in enumerate(rows)}
+        for present in self.store.sessions.values():
+            for student_no in present:
+                if student_no not in position:
+                    position[student_no] = len(rows)
+                    rows.append(student_no)
+
+        keys = list(self.store.sessions)
+        matrix = np.zeros((len(rows), len(keys)), dtype=bool)
+        for column, key in enumerate(keys):
+            present = self.store.sessions[key]
+            if present:
+                matrix[np.fromiter((position[s] for s in present), dtype=np.intp, count=len(present)), column] = True
+        return matrix, rows, keys
+
+    def recompute(self, student_nos):
+        """Rebuild the counters from the full matrix and return (student numbers, rates) as arrays."""
+        matrix, rows, keys = self.matrix(student_nos)
+        per_student = matrix.sum(axis=1)
+        per_session = matrix.sum(axis=0)
+        self.session_totals = dict(zip(keys, per_session.tolist()))
+        self.student_totals = {student_no: total for student_no, total in zip(rows, per_student.tolist()) if total}
+        rates = per_student / len(keys) if keys else np.zeros(len(rows))
+        return np.array(rows), rates
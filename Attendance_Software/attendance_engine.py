@@ -0,0 +1,148 @@
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from attendance_store import AttendanceStore
+
+
+class AttendanceRegister:
+    """Roster and marking core of the attendance register, with no Tk dependency.
+
+    Student records are dicts: no, student_no, first_name, surname, present
+    and iid (the Treeview item id, left for the GUI to fill in). An optional
+    analytics object is told about every new mark.
+    """
+
+    def __init__(self, store, date, session, analytics=None):
+        self.store = store
+        self.date = date
+        self.session = session
+        self.analytics = analytics
+
+        present = self.store.present(date, session)
+        self.students = []
+        self.student_index = {}  # student_no -> student record
+        for no, (student_no, (first_name, surname)) in enumerate(self.store.roster.items(), start=1):
+            student = {'no': no, 'student_no': student_no, 'first_name': first_name, 'surname': surname,
+                       'present': 1 if student_no in present else 0, 'iid': None}
+            self.students.append(student)
+            self.student_index[student_no] = student
+
+    def find_student(self, student_no):
+        return self.student_index.get(student_no)
+
+    def add_students(self, rows):
+        """Add (student_no, first_name, surname) rows, skipping numbers already on the roster.
+
+        Returns the new records; they are written to the store in one batch.
+        """
+        added = []
+        for student_no, first_name, surname in rows:
+            if student_no in self.student_index:
+                continue
+            student = {'no': len(self.students) + 1, 'student_no': student_no, 'first_name': first_name,
+                       'surname': surname, 'present': 0, 'iid': None}
+            self.students.append(student)
+            self.student_index[student_no] = student
+            added.append(student)
+        if added:
+            self.store.add_students(added)
+        return added
+
+    def delete_student(self, student_no):
+        """Remove a student and renumber the rows after it. Returns the old position, or -1."""
+        student = self.student_index.pop(student_no, None)
+        if student is None:
+            return -1
+        row = student['no'] - 1  # 'no' is kept equal to the record's position + 1
+        del self.students[row]
+        for index in range(row, len(self.students)):
+            self.students[index]['no'] = index + 1
+        self.store.delete_student(student_no)
+        return row
+
+    def mark_batch(self, student_nos):
+        """Mark every student number present for this date and session.
+
+        Returns (hits, misses): the records that were found and the numbers that
+        were not. New marks are written to the store in one batch; students who
+        were already marked are hits but are not logged again.
+        """
+        hits = []
+        misses = []
+        records = []
+        for student_no in student_nos:
+            student = self.student_index.get(student_no)
+            if student is None:
+                misses.append(student_no)
+                continue
+            if not student['present']:
+                student['present'] = 1
+                records.append(["mark", self.date, self.session, student_no])
+            hits.append(student)
+        if records:
+            self.store.append(records)
+            if self.analytics is not None:
+                for record in records:
+                    self.analytics.add_mark(self.date, self.session, record[3])
+        return hits, misses
+
+    def mark(self, student_no):
+        hits, misses = self.mark_batch([student_no])
+        return hits[0] if hits else None
+
+    def mark_scan_file(self, path, batch_size=10000):
+        """Apply a badge-reader dump (one student number per line) in batches.
+
+        Returns (hits, misses) over the whole file; unreadable lines count as misses.
+        """
+        hits = []
+        misses = []
+        with open(path, "r", encoding="utf-8") as file:
+            batch = []
+            for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    batch.append(int(line))
+                except ValueError:
+                    misses.append(line)
+                    continue
+                if len(batch) == batch_size:
+                    batch_hits, batch_misses = self.mark_batch(batch)
+                    hits.extend(batch_hits)
+                    misses.extend(batch_misses)
+                    batch = []
+            batch_hits, batch_misses = self.mark_batch(batch)
+            hits.extend(batch_hits)
+            misses.extend(batch_misses)
+        return hits, misses
+
+    def close(self):
+        self.store.close()
+
+
+def benchmark(students=20000, scans=20000):
+    # Time a full roster load and one lecture hall of scans, without a display
+    with tempfile.TemporaryDirectory() as folder:
+        store = AttendanceStore(os.path.join(folder, "log.jsonl"), os.path.join(folder, "snapshot.json"))
+        register = AttendanceRegister(store, str(datetime.now().date()), "Benchmark")
+
+        started = time.perf_counter()
+        register.add_students((1000000 + i, "First", "Surname") for i in range(students))
+        added = time.perf_counter() - started
+
+        scan_list = [1000000 + (i * 7) % (students + students // 10) for i in range(scans)]
+        started = time.perf_counter()
+        hits, misses = register.mark_batch(scan_list)
+        marked = time.perf_counter() - started
+        register.close()
+
+    print(f"Added {students} students in {added:.3f} s")
+    print(f"Applied {scans} scans in {marked:.3f} s ({scans / marked:,.0f} scans/sec): {len(hits)} hits, {len(misses)} misses")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,159 @@
+import json
+import os
+
+# Files used to persist the register between runs
+LOG_FILE = "attendance_log.jsonl"
+SNAPSHOT_FILE = "attendance_snapshot.json"
+
+
+class AttendanceStore:
+    """Append-only attendance log with a compact snapshot of everything already replayed.
+
+    Every change is written as one short JSON line:
+        ["add", student_no, first_name, surname]
+        ["del", student_no]
+        ["mark", date, session, student_no]
+    The snapshot remembers how many bytes of the log it covers, so startup
+    only has to replay the lines written after it. The roster and each
+    session are kept in their own files under session_dir, listed in the
+    small snapshot_file, so a snapshot only rewrites the roster if it
+    changed and the sessions marked since the last one; closed sessions
+    are never written again.
+    """
+
+    SNAPSHOT_EVERY = 1000  # Log records written between automatic snapshots
+
+    def __init__(self, log_file=LOG_FILE, snapshot_file=SNAPSHOT_FILE, session_dir=None):
+        self.log_file = log_file
+        self.snapshot_file = snapshot_file
+        self.session_dir = session_dir or os.path.splitext(snapshot_file)[0] + "_sessions"
+        self.roster = {}  # student_no -> (first_name, surname), in roster order
+        self.sessions = {}  # "date|session" -> set of student numbers marked present
+        self.session_files = {}  # "date|session" -> file name in session_dir
+        self.roster_changed = True  # Roster differs from its snapshot file, which may not exist yet
+        self.changed_sessions = set()  # Session keys marked since their file was last written
+        self.offset = 0  # Bytes of the log already folded into the snapshot
+        self.unsnapshotted = 0  # Records written since the last snapshot
+        self.load()
+        self.log = open(self.log_file, "ab")
+
+    @staticmethod
+    def session_key(date, session):
+        return f"{date}|{session}"
+
+    def load(self):
+        """Load the snapshot, then replay the tail of the log written after it."""
+        if os.path.exists(self.snapshot_file):
+            with open(self.snapshot_file, "r", encoding="utf-8") as file:
+                snapshot = json.load(file)
+            self.offset = snapshot["offset"]
+            if "session_files" in snapshot:
+                roster = self.read_part("roster.json")
+                self.roster_changed = False
+                self.session_files = snapshot["session_files"]
+                sessions = {key: self.read_part(name) for key, name in self.session_files.items()}
+            else:
+                # Older single-file snapshot: everything goes to the split layout on the next snapshot
+                roster, sessions = snapshot["roster"], snapshot["sessions"]
+                self.changed_sessions = set(sessions)
+            self.roster = {student_no: (first_name, surname) for student_no, first_name, surname in roster}
+            self.sessions = {key: set(present) for key, present in sessions.items()}
+
+        if not os.path.exists(self.log_file):
+            return
+        if os.path.getsize(self.log_file) < self.offset:
+            # The log was replaced behind the snapshot's back, so rebuild from the log alone
+            self.roster, self.sessions, self.offset = {}, {}, 0
+            self.session_files, self.roster_changed, self.changed_sessions = {}, True, set()
+
+        with open(self.log_file, "rb") as file:
+            file.seek(self.offset)
+            good_end = self.offset
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break  # Torn write from a crash, dropped below
+                self.apply(json.loads(line))
+                good_end += len(line)
+                self.unsnapshotted += 1
+
+        if good_end < os.path.getsize(self.log_file):
+            with open(self.log_file, "r+b") as file:
+                file.truncate(good_end)
+
+    def apply(self, record):
+        op = record[0]
+        if op == "add":
+            self.roster[record[1]] = (record[2], record[3])
+            self.roster_changed = True
+        elif op == "del":
+            self.roster.pop(record[1], None)
+            self.roster_changed = True
+        elif op == "mark":
+            key = self.session_key(record[1], record[2])
+            self.sessions.setdefault(key, set()).add(record[3])
+            self.changed_sessions.add(key)
+
+    def append(self, records):
+        """Apply the records and write them to the log in a single write."""
+        for record in records:
+            self.apply(record)
+        self.log.write("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records).encode("utf-8"))
+        self.log.flush()
+        self.unsnapshotted += len(records)
+        if self.unsnapshotted >= self.SNAPSHOT_EVERY:
+            self.snapshot()
+
+    def add_students(self, students):
+        self.append([["add", s['student_no'], s['first_name'], s['surname']] for s in students])
+
+    def delete_student(self, student_no):
+        self.append([["del", student_no]])
+
+    def mark(self, date, session, student_no):
+        self.append([["mark", date, session, student_no]])
+
+    def present(self, date, session):
+        """Student numbers marked present for the given date and session."""
+        return self.sessions.get(self.session_key(date, session), set())
+
+    def read_part(self, name):
+        with open(os.path.join(self.session_dir, name), "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    @staticmethod
+    def write_atomic(path, value):
+        tmp_file = path + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as file:
+            json.dump(value, file, separators=(",", ":"))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_file, path)
+
+    def snapshot(self):
+        """Write what changed since the last snapshot and record how much of the log it covers.
+
+        The roster and session files go first and the index last. A crash in
+        between leaves files slightly ahead of the index's offset, which is
+        harmless: replaying the log from that offset sets the same values again.
+        """
+        self.log.flush()
+        os.fsync(self.log.fileno())
+        offset = self.log.tell()
+        os.makedirs(self.session_dir, exist_ok=True)
+        if self.roster_changed:
+            self.write_atomic(os.path.join(self.session_dir, "roster.json"),
+                              [[student_no, first_name, surname] for student_no, (first_name, surname) in self.roster.items()])
+        for key in self.changed_sessions:
+            if key not in self.session_files:
+                self.session_files[key] = f"session_{len(self.session_files):05}.json"  # Keys may hold any text
+            self.write_atomic(os.path.join(self.session_dir, self.session_files[key]), sorted(self.sessions[key]))
+        self.write_atomic(self.snapshot_file, {"offset": offset, "session_files": self.session_files})
+        self.offset = offset
+        self.roster_changed = False
+        self.changed_sessions = set()
+        self.unsnapshotted = 0
+
+    def close(self):
+        if self.unsnapshotted:
+            self.snapshot()
+        self.log.close()
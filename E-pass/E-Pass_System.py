@@ -1,98 +1,522 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from tkinter import filedialog, messagebox, ttk
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import functools
+import hashlib
 import json
+import mimetypes
 import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import urllib.parse
+
+# Columns of the requests table, in the order they are stored
+REQUEST_FIELDS = ("request_id", "name", "contact", "id_proof", "reason", "attachment", "status", "e_pass_id", "appeal")
+# Prefix of an attachment field whose old file path could not be copied into the attachment store
+MISSING_ATTACHMENT = "missing:"
+
+
+def locked(method):
+    """Run the method while holding the system's lock, so one core can serve many threads."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class GroupCommitter:
+    """Background thread that saves newly registered requests in batches.
+
+    Callers block in save() until the batch holding their request is
+    committed, so an acknowledged submission is on disk, while many
+    concurrent submissions share one commit. The committer writes through
+    its own connection and never takes the system lock, so readers and
+    admin actions do not wait behind its fsyncs. A failed batch raises its
+    error in every waiter; should the thread itself stop, save() raises
+    at once instead of waiting for a commit that never comes.
+    """
+
+    def __init__(self, system):
+        self.system = system
+        self.db = sqlite3.connect(system.db_file, timeout=30, check_same_thread=False)  # Only used by the thread
+        self.db.execute("PRAGMA synchronous=FULL")
+        self.condition = threading.Condition()
+        self.queue = []  # [request, done event, error] entries waiting for the next commit
+        self.batch = []  # Entries being committed right now
+        self.stopped = False  # Set if the thread exits, so save() no longer waits on it
+        self.thread = threading.Thread(target=self.run, name="epass-committer", daemon=True)
+        self.thread.start()
+
+    def save(self, request):
+        entry = [request, threading.Event(), None]
+        with self.condition:
+            if self.stopped:
+                raise RuntimeError("The request committer has stopped; restart the server.")
+            self.queue.append(entry)
+            self.condition.notify()
+        entry[1].wait()
+        if entry[2] is not None:
+            raise entry[2]
+
+    def run(self):
+        try:
+            self.commit_batches()
+        finally:
+            # Release anyone still queued rather than leave them blocked forever
+            with self.condition:
+                self.stopped = True
+                stranded, self.queue = self.batch + self.queue, []
+            for entry in stranded:
+                if not entry[1].is_set():
+                    entry[2] = RuntimeError("The request committer has stopped; restart the server.")
+                    entry[1].set()
+
+    def commit_batches(self):
+        while True:
+            with self.condition:
+                while not self.queue:
+                    self.condition.wait()
+                self.batch, self.queue = self.queue, []
+            batch = self.batch
+            error = None
+            try:
+                # New requests are not published yet, so nothing else can change their rows meanwhile
+                with self.db:
+                    self.db.executemany(f"INSERT OR REPLACE INTO requests VALUES ({', '.join('?' * len(REQUEST_FIELDS))})",
+                                        ([entry[0][field] for field in REQUEST_FIELDS] for entry in batch))
+                    self.db.execute("INSERT INTO meta (key, value) VALUES ('current_request_id', ?) "
+                                    "ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)",
+                                    (max(entry[0]["request_id"] for entry in batch) + 1,))
+            except Exception as e:  # Any failure goes to the waiters; letting it escape would strand them
+                error = e
+            for entry in batch:
+                entry[2] = error
+                entry[1].set()
+
+
+class AttachmentStore:
+    """Content-addressed copies of submitted attachments, one file per distinct content.
+
+    Files live under folder/<first two hex digits>/<sha256><extension> and are
+    copied in chunks, so large scans never sit in memory. Their metadata (size,
+    type, original name, thumbnail-ready flag) is kept in the attachments table
+    and cached in self.index, so callers never need to stat the files.
+    """
+
+    CHUNK_SIZE = 1024 * 1024
+    THUMBNAIL_TYPES = ("image/png", "image/gif")  # Formats Tk's PhotoImage can show directly
+
+    def __init__(self, db, folder):
+        self.db = db  # Only used under the owning system's lock
+        self.folder = folder
+        self.db.execute("CREATE TABLE IF NOT EXISTS attachments (digest TEXT PRIMARY KEY, size INTEGER, "
+                        "type TEXT, name TEXT, thumbnail_ready INTEGER)")
+        self.db.commit()
+        self.index = {}  # digest -> {"size", "type", "name", "thumbnail_ready"}
+        for digest, size, content_type, name, thumbnail_ready in self.db.execute("SELECT * FROM attachments"):
+            self.index[digest] = {"size": size, "type": content_type, "name": name, "thumbnail_ready": bool(thumbnail_ready)}
+
+    def path(self, digest):
+        return os.path.join(self.folder, digest[:2], digest + os.path.splitext(self.index[digest]["name"])[1].lower())
+
+    def copy(self, stream, name, length=None):
+        """Copy a file object into the store, hashing as it goes. Returns (digest, metadata).
+
+        Reads at most length bytes when given. Does not touch the database, so
+        it can run outside the system lock; record() adds the metadata after.
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        handle, temp_path = tempfile.mkstemp(dir=self.folder, suffix=".part")
+        try:
+            with os.fdopen(handle, "wb") as file:
+                while length is None or size < length:
+                    chunk = stream.read(self.CHUNK_SIZE if length is None else min(self.CHUNK_SIZE, length - size))
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    file.write(chunk)
+                    size += len(chunk)
+                file.flush()
+                os.fsync(file.fileno())  # On disk before the request that points at it is acknowledged
+            if length is not None and size < length:
+                raise ValueError(f"Attachment ended after {size} of {length} bytes.")
+
+            digest = digest.hexdigest()
+            content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            metadata = {"size": size, "type": content_type, "name": os.path.basename(name),
+                        "thumbnail_ready": content_type in self.THUMBNAIL_TYPES}
+            target = os.path.join(self.folder, digest[:2], digest + os.path.splitext(name)[1].lower())
+            if digest in self.index:
+                os.remove(temp_path)  # Same content already stored
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(temp_path, target)  # Identical content, so a concurrent copy landing first is harmless
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return digest, metadata
+
+    def record(self, digest, metadata):
+        """Add a copied attachment to the index; the first name stored for a digest is kept."""
+        if digest not in self.index:
+            self.index[digest] = metadata
+            with self.db:
+                self.db.execute("INSERT OR IGNORE INTO attachments VALUES (?, ?, ?, ?, ?)",
+                                (digest, metadata["size"], metadata["type"], metadata["name"], metadata["thumbnail_ready"]))
+        return digest
 
 
 class CurfewEPassSystem:
     def __init__(self):
-        self.requests = []  # Store all e-pass requests
+        self.requests = {}  # Store all e-pass requests, keyed by request ID
+        self.by_status = {}  # status -> {request_id: None}, an insertion-ordered set
+        self.by_contact = {}  # contact -> {request_id: None}
         self.admin_credentials = {"admin": "admin123"}  # Admin login details
         self.current_request_id = 1  # Auto-increment request ID
-        self.data_file = "requests.json"  # File to save requests
-        self.load_requests()  # Load requests from file on startup
+        self.db_file = "requests.db"  # SQLite database, one row per request
+        self.data_file = "requests.json"  # Old JSON file, imported the first time the database is created
+        self.attachment_folder = "attachments"  # Content-addressed copies of submitted files
+        self.lock = threading.RLock()  # Guards the requests, the indexes, the ID counter and self.db
+        self.committer = None  # GroupCommitter when serving many clients at once
+        self.unpublished = set()  # IDs handed out to requests whose batch has not committed yet
+        self.load_requests()  # Load requests from the database on startup
 
     def load_requests(self):
-        """Load requests from the JSON file."""
-        if os.path.exists(self.data_file):
-            with open(self.data_file, "r") as file:
-                data = json.load(file)
-                self.requests = data.get("requests", [])
-                self.current_request_id = data.get("current_request_id", 1)
-
-    def save_requests(self):
-        """Save requests to the JSON file."""
-        data = {
-            "requests": self.requests,
-            "current_request_id": self.current_request_id,
-        }
-        with open(self.data_file, "w") as file:
-            json.dump(data, file)
+        """Open the database (importing requests.json until that succeeds) and load every request."""
+        # SQLite replays or discards an interrupted write when the database is opened,
+        # so a crash never leaves a half-written request behind
+        self.db = sqlite3.connect(self.db_file, timeout=30, check_same_thread=False)  # Shared by threads under self.lock
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=FULL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS requests (request_id INTEGER PRIMARY KEY, name TEXT, contact TEXT, "
+                        "id_proof TEXT, reason TEXT, attachment TEXT, status TEXT, e_pass_id TEXT, appeal TEXT)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        self.db.commit()
+
+        self.attachments = AttachmentStore(self.db, self.attachment_folder)
+
+        self.import_error = None  # Why requests.json could not be imported this time, if it could not
+        if not self.json_imported() and os.path.exists(self.data_file):
+            try:
+                self.import_json(self.data_file)
+            except (OSError, ValueError, KeyError, TypeError, sqlite3.Error) as e:
+                # Nothing was written, so the import is tried again on the next start
+                self.import_error = f"Could not import {self.data_file}: {e}"
+
+        for row in self.db.execute(f"SELECT {', '.join(REQUEST_FIELDS)} FROM requests ORDER BY request_id"):
+            self.add_to_indexes(dict(zip(REQUEST_FIELDS, row)))
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'current_request_id'").fetchone()
+        self.current_request_id = row[0] if row else 1
+        self.migrate_attachments()
+
+    def migrate_attachments(self):
+        """Copy attachments still stored as raw file paths into the attachment store.
+
+        Every old value is rewritten and saved: a digest when the file could be
+        copied, "" for the old "No file selected." text, and MISSING_ATTACHMENT
+        plus the path for a file that is gone. Later starts only compare
+        strings, with no file system calls.
+        """
+        moved = []
+        for request in self.requests.values():
+            path = request["attachment"]
+            if not path or path in self.attachments.index or path.startswith(MISSING_ATTACHMENT):
+                continue  # None, already stored, or already known to be lost
+            if path == "No file selected.":
+                request["attachment"] = ""
+            else:
+                try:
+                    request["attachment"] = self.store_attachment(path)
+                except OSError:
+                    request["attachment"] = MISSING_ATTACHMENT + path  # Lost before the store existed
+            moved.append(request)
+        if moved:
+            self.save_request_batch(moved)
+
+    def store_attachment(self, path):
+        """Copy a local file into the attachment store and return its digest."""
+        with open(path, "rb") as file:
+            digest, metadata = self.attachments.copy(file, path)
+        with self.lock:
+            return self.attachments.record(digest, metadata)
+
+    def attachment_info(self, attachment):
+        """Cached metadata for a request's attachment value, or None if it is not in the store."""
+        return self.attachments.index.get(attachment) if attachment else None
+
+    def json_imported(self):
+        """Whether requests.json has been imported; import_json sets the json_imported marker in meta."""
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'json_imported'").fetchone()
+        if row is None:
+            # New database (0: still to import), or one from before the marker existed,
+            # which counts as imported once anything has been saved to it
+            saved = self.db.execute("SELECT 1 FROM meta WHERE key = 'current_request_id'").fetchone()
+            row = (1 if saved else 0,)
+            with self.db:
+                self.db.execute("INSERT INTO meta (key, value) VALUES ('json_imported', ?)", row)
+        return bool(row[0])
+
+    @locked
+    def import_json(self, path):
+        """Import requests from the old requests.json format in one transaction, marking it as done."""
+        with open(path, "r") as file:
+            data = json.load(file)
+        requests = data.get("requests", [])
+        existing = {row[0] for row in self.db.execute("SELECT request_id FROM requests")}
+        next_id = max([data.get("current_request_id", 1)] + [r["request_id"] + 1 for r in requests]
+                      + [request_id + 1 for request_id in existing])
+        rows = []
+        for r in requests:
+            row = [r.get(field) for field in REQUEST_FIELDS]
+            if r["request_id"] in existing:
+                # Taken by a request submitted while an earlier import was failing; keep both
+                row[0] = next_id
+                next_id += 1
+            rows.append(row)
+        with self.db:
+            self.db.executemany(f"INSERT INTO requests VALUES ({', '.join('?' * len(REQUEST_FIELDS))})", rows)
+            self.db.execute("INSERT INTO meta (key, value) VALUES ('current_request_id', ?) "
+                            "ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)", (next_id,))
+            self.db.execute("UPDATE meta SET value = 1 WHERE key = 'json_imported'")
+        return len(requests)
+
+    def save_request(self, request):
+        """Write one request (and the ID counter) as a single transaction."""
+        with self.db:
+            self.db.execute(f"INSERT OR REPLACE INTO requests VALUES ({', '.join('?' * len(REQUEST_FIELDS))})",
+                            [request[field] for field in REQUEST_FIELDS])
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('current_request_id', ?)", (self.current_request_id,))
+
+    def save_request_batch(self, requests):
+        """Group commit: write every changed request (and the ID counter) in one transaction."""
+        with self.db:
+            self.db.executemany(f"INSERT OR REPLACE INTO requests VALUES ({', '.join('?' * len(REQUEST_FIELDS))})",
+                                ([request[field] for field in REQUEST_FIELDS] for request in requests))
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('current_request_id', ?)", (self.current_request_id,))
+
+    def start_group_commit(self):
+        """Save new requests through a GroupCommitter instead of one commit each."""
+        self.committer = GroupCommitter(self)
+
+    def add_to_indexes(self, request):
+        self.requests[request["request_id"]] = request
+        self.by_status.setdefault(request["status"], {})[request["request_id"]] = None
+        self.by_contact.setdefault(request["contact"], {})[request["request_id"]] = None
+
+    def remove_from_indexes(self, request):
+        del self.requests[request["request_id"]]
+        del self.by_status[request["status"]][request["request_id"]]
+        del self.by_contact[request["contact"]][request["request_id"]]
+        if not self.by_contact[request["contact"]]:
+            del self.by_contact[request["contact"]]
+
+    def set_status(self, request, status):
+        del self.by_status[request["status"]][request["request_id"]]
+        request["status"] = status
+        self.by_status.setdefault(status, {})[request["request_id"]] = None
+
+    @locked
+    def requests_with_status(self, status):
+        """Requests with the given status, oldest first, without scanning the others."""
+        return [self.requests[request_id] for request_id in self.by_status.get(status, {})]
+
+    @locked
+    def requests_for_contact(self, contact):
+        return [self.requests[request_id] for request_id in self.by_contact.get(contact, {})]
+
+    @locked
+    def find_request_ids(self, status=None, search=""):
+        """IDs for the admin view: one status (None for all), optionally searched by name or contact.
+
+        An exact contact is answered from the contact index; anything else is a
+        case-insensitive substring match over the chosen status only.
+        """
+        candidates = self.by_status.get(status, {}) if status is not None else self.requests
+        search = search.strip()
+        if not search:
+            return list(candidates)
+        if search in self.by_contact:
+            return [i for i in self.by_contact[search] if status is None or self.requests[i]["status"] == status]
+        search = search.lower()
+        return [i for i in candidates
+                if search in self.requests[i]["name"].lower() or search in self.requests[i]["contact"].lower()]
+
+    def create_request(self, name, contact, id_proof, reason, attachment):
+        """Register a new request and return it once it is saved. Safe to call from many threads.
+
+        The request only becomes visible (to lookups, the admin view and
+        approvals) after it is on disk; if saving fails, it never appears.
+        """
+        with self.lock:
+            request = {
+                "request_id": self.current_request_id,  # Allocated under the lock, so never handed out twice
+                "name": name,
+                "contact": contact,
+                "id_proof": id_proof,
+                "reason": reason,
+                "attachment": attachment,
+                "status": "Pending",
+                "e_pass_id": None,
+                "appeal": None,
+            }
+            self.current_request_id += 1
+            if self.committer is None:
+                self.save_request(request)  # Save the new request
+                self.add_to_indexes(request)
+                return request
+            self.unpublished.add(request["request_id"])
+        try:
+            self.committer.save(request)  # Waits for the batch commit that includes it
+        finally:
+            with self.lock:
+                self.unpublished.discard(request["request_id"])
+        with self.lock:
+            self.add_to_indexes(request)
+        return request
 
     def register_request(self, name, contact, id_proof, reason, attachment):
-        request = {
-            "request_id": self.current_request_id,
-            "name": name,
-            "contact": contact,
-            "id_proof": id_proof,
-            "reason": reason,
-            "attachment": attachment,
-            "status": "Pending",
-            "e_pass_id": None,
-            "appeal": None,
-        }
-        self.requests.append(request)
-        self.current_request_id += 1
-        self.save_requests()  # Save requests after adding a new one
+        """Register a request from the window; attachment is a local file path, or "" for none."""
+        if attachment:
+            attachment = self.store_attachment(attachment)  # Copied before the request points at it
+        request = self.create_request(name, contact, id_proof, reason, attachment)
         return f"Request submitted successfully! Your request ID is {request['request_id']}."
 
-    def get_request_status(self, request_id):
-        for request in self.requests:
-            if request["request_id"] == request_id:
-                status = f"Request ID: {request_id}\nStatus: {request['status']}\n"
-                if request["status"] == "Approved":
-                    status += f"E-Pass ID: {request['e_pass_id']}"
-                elif request["status"] == "Denied":
-                    status += f"\nAppeal: {request['appeal']}" if request["appeal"] else ""
-                return status
-        return "Request ID not found."
+    @locked
+    def get_request(self, request_id):
+        """A copy of the request, or None."""
+        request = self.requests.get(request_id)
+        return dict(request) if request is not None else None
 
+    @locked
+    def get_request_status(self, request_id):
+        request = self.requests.get(request_id)
+        if request is None:
+            return "Request ID not found."
+        status = f"Request ID: {request_id}\nStatus: {request['status']}\n"
+        if request["status"] == "Approved":
+            status += f"E-Pass ID: {request['e_pass_id']}"
+        elif request["status"] == "Denied":
+            status += f"\nAppeal: {request['appeal']}" if request["appeal"] else ""
+        return status
+
+    @locked
     def approve_request(self, request_id):
-        for request in self.requests:
-            if request["request_id"] == request_id:
-                if request["status"] == "Pending":
-                    request["status"] = "Approved"
-                    request["e_pass_id"] = f"EP-{request_id:05}"
-                    self.save_requests()  # Save requests after approval
-                    return f"Request {request_id} approved. E-Pass ID: {request['e_pass_id']}"
-                return "Request already processed."
-        return "Request ID not found."
-
+        request = self.requests.get(request_id)
+        if request is None:
+            return "Request ID not found."
+        if request["status"] == "Pending":
+            self.set_status(request, "Approved")
+            request["e_pass_id"] = f"EP-{request_id:05}"
+            self.save_request(request)  # Save the request after approval
+            return f"Request {request_id} approved. E-Pass ID: {request['e_pass_id']}"
+        return "Request already processed."
+
+    @locked
     def deny_request(self, request_id):
-        for request in self.requests:
-            if request["request_id"] == request_id:
-                if request["status"] == "Pending":
-                    request["status"] = "Denied"
-                    self.save_requests()  # Save requests after denial
-                    return f"Request {request_id} denied."
-                return "Request already processed."
-        return "Request ID not found."
-
+        request = self.requests.get(request_id)
+        if request is None:
+            return "Request ID not found."
+        if request["status"] == "Pending":
+            self.set_status(request, "Denied")
+            self.save_request(request)  # Save the request after denial
+            return f"Request {request_id} denied."
+        return "Request already processed."
+
+    @locked
+    def select_request_ids(self, request_ids=None, id_range=None, reason=None, status="Pending"):
+        """IDs of requests matching every given criterion, in ID order.
+
+        request_ids is a list of IDs, id_range an inclusive (first, last) pair,
+        reason a case-insensitive substring and status a status (None for any).
+        With no IDs or range given, candidates come from the status index.
+        """
+        if request_ids is None and id_range is None:
+            candidates = self.by_status.get(status, {}) if status is not None else self.requests
+        else:
+            candidates = set(request_ids or [])
+            if id_range is not None:
+                first, last = id_range
+                if last - first + 1 > len(self.requests):
+                    # A wide (or mistyped) range: check the existing IDs against its bounds instead
+                    candidates.update(request_id for request_id in self.requests if first <= request_id <= last)
+                else:
+                    candidates.update(range(first, last + 1))
+            candidates = sorted(candidates)
+
+        reason = reason.lower() if reason else None
+        selected = []
+        for request_id in candidates:
+            request = self.requests.get(request_id)
+            if request is None:
+                continue
+            if status is not None and request["status"] != status:
+                continue
+            if reason and reason not in request["reason"].lower():
+                continue
+            selected.append(request_id)
+        return selected
+
+    @locked
+    def process_requests(self, request_ids, approve):
+        """Approve (or deny) every pending request in the list, then persist them with one commit."""
+        changed = []
+        already_processed = not_found = 0
+        for request_id in request_ids:
+            request = self.requests.get(request_id)
+            if request is None:
+                not_found += 1
+            elif request["status"] != "Pending":
+                already_processed += 1
+            else:
+                if approve:
+                    self.set_status(request, "Approved")
+                    request["e_pass_id"] = f"EP-{request_id:05}"
+                else:
+                    self.set_status(request, "Denied")
+                changed.append(request)
+        if changed:
+            self.save_request_batch(changed)
+        action = "approved" if approve else "denied"
+        return (f"{len(changed)} request(s) {action}.\n"
+                f"Already processed: {already_processed}\nNot found: {not_found}")
+
+    def approve_requests(self, request_ids):
+        return self.process_requests(request_ids, approve=True)
+
+    def deny_requests(self, request_ids):
+        return self.process_requests(request_ids, approve=False)
+
+    @locked
     def delete_request(self, request_id):
         """Delete a request by request ID (only accessible by admin)."""
-        for request in self.requests:
-            if request["request_id"] == request_id:
-                self.requests.remove(request)
-                self.save_requests()  # Save after deletion
-                return f"Request {request_id} deleted."
-        return "Request ID not found."
-
+        request = self.requests.get(request_id)
+        if request is None:
+            return "Request ID not found."
+        self.remove_from_indexes(request)
+        with self.db:  # Save after deletion
+            self.db.execute("DELETE FROM requests WHERE request_id = ?", (request_id,))
+        return f"Request {request_id} deleted."
+
+    @locked
     def delete_all_requests(self):
-        """Delete all requests and reset the request ID to 1."""
+        """Delete all requests and reset the request ID to 1 (or past any submission still being saved)."""
         self.requests.clear()  # Clear all requests
-        self.current_request_id = 1  # Reset the request ID counter
-        self.save_requests()  # Save after clearing all requests
-        return "All requests have been deleted, and the ID counter has been reset to 1."
+        self.by_status.clear()
+        self.by_contact.clear()
+        # Submissions still being saved keep their rows and IDs, and appear once committed
+        self.current_request_id = max(self.unpublished, default=0) + 1  # Reset the request ID counter
+        with self.db:  # Save after clearing all requests
+            self.db.execute(f"DELETE FROM requests WHERE request_id NOT IN ({', '.join('?' * len(self.unpublished))})",
+                            list(self.unpublished))
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('current_request_id', ?)", (self.current_request_id,))
+        return f"All requests have been deleted, and the ID counter has been reset to {self.current_request_id}."
 
 
 class EPassGUI:
@@ -102,6 +526,8 @@ class EPassGUI:
         self.root.title("Curfew E-Pass System")
         self.root.geometry("600x500")
         self.create_home_screen()
+        if self.system.import_error:
+            messagebox.showwarning("Import Failed", f"{self.system.import_error}\nIt will be tried again next time.")
 
     def clear_window(self):
         """Clears the current window for the next screen."""
@@ -142,7 +568,7 @@ class EPassGUI:
 
         def select_file():
             file_path = filedialog.askopenfilename(title="Select a file")
-            attachment_label.config(text=file_path)
+            attachment_label.config(text=file_path or "No file selected.")
 
         attachment_label = tk.Label(self.root, text="No file selected.")
         attachment_label.pack(pady=5)
@@ -155,8 +581,14 @@ class EPassGUI:
             id_proof = id_proof_entry.get()
             reason = reason_entry.get()
             attachment = attachment_label.cget("text")
+            if attachment == "No file selected.":
+                attachment = ""
             if name and contact and id_proof and reason:
-                message = self.system.register_request(name, contact, id_proof, reason, attachment)
+                try:
+                    message = self.system.register_request(name, contact, id_proof, reason, attachment)
+                except OSError as e:
+                    messagebox.showerror("Error", f"Could not read attachment: {e}")
+                    return
                 messagebox.showinfo("Success", message)
                 self.create_home_screen()
             else:
@@ -206,6 +638,8 @@ class EPassGUI:
 
         tk.Button(self.root, text="Login", command=login).pack(pady=10)
 
+    ADMIN_PAGE_SIZE = 50  # Requests shown per page in the admin table
+
     def create_admin_screen(self):
         self.clear_window()
 
@@ -214,32 +648,69 @@ class EPassGUI:
         if not self.system.requests:
             tk.Label(self.root, text="No requests found.").pack()
         else:
-            for request in self.system.requests:
-                details = (
-                    f"ID: {request['request_id']} | Name: {request['name']} | Status: {request['status']}\n"
-                    f"Reason: {request['reason']} | Attachment: {request['attachment']}"
-                )
-                tk.Label(self.root, text=details, justify="left", wraplength=500).pack(anchor="w", padx=10, pady=5)
-
-                if request["attachment"] and os.path.exists(request["attachment"]):
-                    def open_file(filepath=request["attachment"]):
-                        try:
-                            os.startfile(filepath)
-                        except Exception as e:
-                            messagebox.showerror("Error", f"Could not open file: {e}")
-
-                    tk.Button(self.root, text="Open Attachment", command=open_file).pack(pady=5, anchor="w", padx=20)
+            # Filters: status from the status index, search by name or contact
+            filter_frame = tk.Frame(self.root)
+            filter_frame.pack(pady=5)
+            tk.Label(filter_frame, text="Status:").pack(side=tk.LEFT)
+            self.admin_status = ttk.Combobox(filter_frame, values=["Pending", "Approved", "Denied", "All"], state="readonly", width=10)
+            self.admin_status.set("Pending")
+            self.admin_status.pack(side=tk.LEFT, padx=5)
+            self.admin_status.bind("<<ComboboxSelected>>", lambda event: self.show_admin_page(0))
+            tk.Label(filter_frame, text="Search name/contact:").pack(side=tk.LEFT)
+            self.admin_search = tk.Entry(filter_frame, width=20)
+            self.admin_search.pack(side=tk.LEFT, padx=5)
+            self.admin_search.bind("<Return>", lambda event: self.show_admin_page(0))
+            tk.Button(filter_frame, text="Search", command=lambda: self.show_admin_page(0)).pack(side=tk.LEFT)
+
+            # Table holding only the current page
+            columns = ("ID", "Name", "Contact", "Status", "Reason", "Attachment")
+            self.admin_table = ttk.Treeview(self.root, columns=columns, show="headings", height=10)
+            for column, width in zip(columns, (50, 110, 100, 70, 130, 100)):
+                self.admin_table.heading(column, text=column)
+                self.admin_table.column(column, width=width)
+            self.admin_table.pack(fill=tk.BOTH, expand=True, padx=10)
+
+            page_frame = tk.Frame(self.root)
+            page_frame.pack(pady=5)
+            tk.Button(page_frame, text="< Prev", command=lambda: self.show_admin_page(self.admin_page - 1)).pack(side=tk.LEFT)
+            self.admin_page_label = tk.Label(page_frame, text="")
+            self.admin_page_label.pack(side=tk.LEFT, padx=10)
+            tk.Button(page_frame, text="Next >", command=lambda: self.show_admin_page(self.admin_page + 1)).pack(side=tk.LEFT)
+
+            def open_file():
+                selection = self.admin_table.selection()
+                if not selection:
+                    messagebox.showwarning("No Selection", "Select a request first.")
+                    return
+                digest = self.system.requests[int(selection[0])]["attachment"]
+                if self.system.attachment_info(digest) is None:
+                    messagebox.showerror("Error", "This request has no stored attachment.")
+                    return
+                try:
+                    os.startfile(self.system.attachments.path(digest))
+                except Exception as e:
+                    messagebox.showerror("Error", f"Could not open file: {e}")
+
+            tk.Button(page_frame, text="Open Attachment", command=open_file).pack(side=tk.LEFT, padx=10)
 
             tk.Label(self.root, text="Enter Request ID to Process:").pack(pady=5)
             request_id_entry = tk.Entry(self.root)
             request_id_entry.pack()
 
+            def on_select(event):
+                selection = self.admin_table.selection()
+                if selection:
+                    request_id_entry.delete(0, tk.END)
+                    request_id_entry.insert(0, selection[0])
+
+            self.admin_table.bind("<<TreeviewSelect>>", on_select)
+
             def approve():
                 try:
                     request_id = int(request_id_entry.get())
                     message = self.system.approve_request(request_id)
                     messagebox.showinfo("Result", message)
-                    self.create_admin_screen()
+                    self.show_admin_page(self.admin_page)
                 except ValueError:
                     messagebox.showerror("Error", "Invalid Request ID!")
 
@@ -248,7 +719,7 @@ class EPassGUI:
                     request_id = int(request_id_entry.get())
                     message = self.system.deny_request(request_id)
                     messagebox.showinfo("Result", message)
-                    self.create_admin_screen()
+                    self.show_admin_page(self.admin_page)
                 except ValueError:
                     messagebox.showerror("Error", "Invalid Request ID!")
 
@@ -257,7 +728,7 @@ class EPassGUI:
                     request_id = int(request_id_entry.get())
                     message = self.system.delete_request(request_id)
                     messagebox.showinfo("Result", message)
-                    self.create_admin_screen()
+                    self.show_admin_page(self.admin_page)
                 except ValueError:
                     messagebox.showerror("Error", "Invalid Request ID!")
 
@@ -266,15 +737,205 @@ class EPassGUI:
                 messagebox.showinfo("Result", message)
                 self.create_admin_screen()
 
-            tk.Button(self.root, text="Approve", command=approve).pack(pady=5)
-            tk.Button(self.root, text="Deny", command=deny).pack(pady=5)
-            tk.Button(self.root, text="Delete", command=delete).pack(pady=5)
-            tk.Button(self.root, text="Delete All Requests", command=delete_all).pack(pady=5)
+            action_frame = tk.Frame(self.root)
+            action_frame.pack(pady=5)
+            tk.Button(action_frame, text="Approve", command=approve).pack(side=tk.LEFT, padx=2)
+            tk.Button(action_frame, text="Deny", command=deny).pack(side=tk.LEFT, padx=2)
+            tk.Button(action_frame, text="Delete", command=delete).pack(side=tk.LEFT, padx=2)
+            tk.Button(action_frame, text="Delete All Requests", command=delete_all).pack(side=tk.LEFT, padx=2)
+
+            # Bulk processing: every pending request matching the IDs/ranges and reason
+            bulk_frame = tk.Frame(self.root)
+            bulk_frame.pack(pady=5)
+            tk.Label(bulk_frame, text="Bulk IDs (e.g. 3, 7-120; blank for all pending):").grid(row=0, column=0, sticky="e")
+            bulk_ids_entry = tk.Entry(bulk_frame)
+            bulk_ids_entry.grid(row=0, column=1)
+            tk.Label(bulk_frame, text="Reason contains (optional):").grid(row=1, column=0, sticky="e")
+            bulk_reason_entry = tk.Entry(bulk_frame)
+            bulk_reason_entry.grid(row=1, column=1)
+
+            def process_bulk(approve_all):
+                request_ids = []
+                id_ranges = []
+                try:
+                    for part in bulk_ids_entry.get().replace(" ", "").split(","):
+                        if "-" in part:
+                            first, last = part.split("-")
+                            id_ranges.append((int(first), int(last)))
+                        elif part:
+                            request_ids.append(int(part))
+                except ValueError:
+                    messagebox.showerror("Error", "Invalid Request IDs!")
+                    return
+
+                reason = bulk_reason_entry.get().strip()
+                if request_ids or id_ranges:
+                    selected = self.system.select_request_ids(request_ids=request_ids, reason=reason)
+                    for id_range in id_ranges:
+                        selected += self.system.select_request_ids(id_range=id_range, reason=reason)
+                else:
+                    selected = self.system.select_request_ids(reason=reason)
+                if not selected:
+                    messagebox.showinfo("Result", "No pending requests match.")
+                    return
+                action = "Approve" if approve_all else "Deny"
+                if messagebox.askyesno("Confirm", f"{action} {len(selected)} pending request(s)?"):
+                    message = self.system.process_requests(dict.fromkeys(selected), approve_all)
+                    messagebox.showinfo("Result", message)
+                    self.show_admin_page(self.admin_page)
+
+            tk.Button(bulk_frame, text="Approve Matching", command=lambda: process_bulk(True)).grid(row=2, column=0)
+            tk.Button(bulk_frame, text="Deny Matching", command=lambda: process_bulk(False)).grid(row=2, column=1)
+
+            self.show_admin_page(0)
 
         tk.Button(self.root, text="Back", command=self.create_home_screen).pack(pady=10)
 
+    def describe_attachment(self, attachment):
+        # From the store's cached metadata, so showing a page never touches the files
+        if not attachment:
+            return ""
+        info = self.system.attachment_info(attachment)
+        if info is None:
+            return "Missing"
+        return f"{info['type'].split('/')[-1].upper()}, {max(info['size'] // 1024, 1)} KB"
+
+    def show_admin_page(self, page):
+        status = self.admin_status.get()
+        request_ids = self.system.find_request_ids(None if status == "All" else status, self.admin_search.get())
+        pages = max((len(request_ids) + self.ADMIN_PAGE_SIZE - 1) // self.ADMIN_PAGE_SIZE, 1)
+        self.admin_page = min(max(page, 0), pages - 1)
+        first = self.admin_page * self.ADMIN_PAGE_SIZE
+
+        self.admin_table.delete(*self.admin_table.get_children())
+        for request_id in request_ids[first:first + self.ADMIN_PAGE_SIZE]:
+            request = self.system.requests[request_id]
+            self.admin_table.insert("", tk.END, iid=str(request_id), values=(
+                request_id, request["name"], request["contact"], request["status"], request["reason"],
+                self.describe_attachment(request["attachment"])))
+        self.admin_page_label.config(text=f"Page {self.admin_page + 1} of {pages} ({len(request_ids)} requests)")
+
+
+class EPassRequestHandler(BaseHTTPRequestHandler):
+    """JSON API for the headless service.
+
+    POST /attachments?name=scan.pdf  raw file body -> 201 {"attachment"}, the digest to submit with a request
+    POST /requests   {"name", "contact", "id_proof", "reason", "attachment"?} -> 201 {"request_id"}
+    GET /requests/N  -> 200 {"request_id", "status", "e_pass_id", "appeal"} or 404
+    """
+
+    protocol_version = "HTTP/1.1"  # Keep-alive, so clients can reuse one connection
+    system = None  # Set by serve()
+    MAX_ATTACHMENT_BYTES = 50 * 1024 * 1024
+
+    def setup(self):
+        super().setup()
+        # Replies are small, so don't let Nagle hold them back waiting for an ACK
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def send_json(self, code, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def post_attachment(self):
+        length = int(self.headers.get("Content-Length", 0))
+        if not 0 < length <= self.MAX_ATTACHMENT_BYTES:
+            self.close_connection = True  # The body is not read, so the connection cannot be reused
+            self.send_json(413 if length else 400, {"error": f"Send 1 to {self.MAX_ATTACHMENT_BYTES} bytes."})
+            return
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        name = query.get("name", ["attachment"])[0]
+        try:
+            digest, metadata = self.system.attachments.copy(self.rfile, name, length)  # Streamed, not buffered
+            with self.system.lock:
+                self.system.attachments.record(digest, metadata)
+        except ValueError as e:
+            self.close_connection = True
+            self.send_json(400, {"error": str(e)})
+            return
+        except (OSError, sqlite3.Error) as e:
+            self.close_connection = True
+            self.send_json(503, {"error": f"Could not store attachment: {e}"})
+            return
+        self.send_json(201, {"attachment": digest, "size": metadata["size"], "type": metadata["type"]})
+
+    def do_POST(self):
+        if urllib.parse.urlsplit(self.path).path == "/attachments":
+            self.post_attachment()
+            return
+        if self.path != "/requests":
+            self.send_json(404, {"error": "Not found"})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            fields = [str(body[field]).strip() for field in ("name", "contact", "id_proof", "reason")]
+        except (ValueError, KeyError, TypeError):
+            self.send_json(400, {"error": "Send JSON with name, contact, id_proof and reason."})
+            return
+        if not all(fields):
+            self.send_json(400, {"error": "All fields except attachment are required!"})
+            return
+        attachment = str(body.get("attachment") or "")
+        if attachment and self.system.attachment_info(attachment) is None:
+            self.send_json(400, {"error": "Unknown attachment; upload it to /attachments first."})
+            return
+        try:
+            request = self.system.create_request(*fields, attachment)
+        except Exception as e:  # Whatever stopped the commit, the client gets an answer instead of a dropped connection
+            self.send_json(503, {"error": f"Could not save request: {e}"})
+            return
+        self.send_json(201, {"request_id": request["request_id"]})
+
+    def do_GET(self):
+        prefix = "/requests/"
+        request = None
+        if self.path.startswith(prefix) and self.path[len(prefix):].isdigit():
+            request = self.system.get_request(int(self.path[len(prefix):]))
+        if request is None:
+            self.send_json(404, {"error": "Request ID not found."})
+            return
+        self.send_json(200, {field: request[field] for field in ("request_id", "status", "e_pass_id", "appeal")})
+
+    def log_message(self, format, *args):
+        pass  # One line per request would dominate the cost under load
+
+
+class EPassServer(ThreadingHTTPServer):
+    request_queue_size = 1024  # Room for many clients connecting at once
+    daemon_threads = True
+
+
+def serve(host="127.0.0.1", port=8765):
+    """Run the headless submission service until interrupted."""
+    system = CurfewEPassSystem()
+    if system.import_error:
+        print(f"Warning: {system.import_error} (it will be tried again next start)")
+    system.start_group_commit()
+    EPassRequestHandler.system = system
+    server = EPassServer((host, port), EPassRequestHandler)
+    print(f"E-Pass service listening on http://{host}:{port}/requests")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = EPassGUI(root)
-    root.mainloop()
+    parser = argparse.ArgumentParser(description="Curfew E-Pass System")
+    parser.add_argument("--serve", action="store_true", help="run the headless HTTP/JSON submission service instead of the window")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.host, args.port)
+    else:
+        root = tk.Tk()
+        app = EPassGUI(root)
+        root.mainloop()
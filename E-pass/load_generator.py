@@ -0,0 +1,96 @@
+"""Local load generator for the E-Pass submission service.
+
+Start the service first:
+
+    python E-Pass_System.py --serve
+
+then run, for example:
+
+    python load_generator.py --clients 32 --requests 200
+
+Each client thread keeps one HTTP connection open, submits its requests,
+then checks the status of each one. The report gives submissions/sec
+across all clients and the p50/p99 latency of the status checks.
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def client(host, port, count, client_no, start, results):
+    connection = http.client.HTTPConnection(host, port)
+    submitted = []
+    submit_latency = []
+    status_latency = []
+    errors = 0
+    start.wait()
+
+    for i in range(count):
+        body = json.dumps({"name": f"Load Client {client_no}", "contact": f"07{client_no:04}{i:04}",
+                           "id_proof": f"ID-{client_no}-{i}", "reason": "Medical" if i % 3 else "Work"})
+        started = time.perf_counter()
+        connection.request("POST", "/requests", body, {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        payload = response.read()
+        submit_latency.append(time.perf_counter() - started)
+        if response.status == 201:
+            submitted.append(json.loads(payload)["request_id"])
+        else:
+            errors += 1
+    submitted_at = time.perf_counter()
+
+    for request_id in submitted:
+        started = time.perf_counter()
+        connection.request("GET", f"/requests/{request_id}")
+        response = connection.getresponse()
+        response.read()
+        status_latency.append(time.perf_counter() - started)
+        if response.status != 200:
+            errors += 1
+    connection.close()
+
+    results.append({"submitted": submitted, "submitted_at": submitted_at, "submit_latency": submit_latency,
+                    "status_latency": status_latency, "errors": errors})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the E-Pass submission service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=16, help="concurrent client threads")
+    parser.add_argument("--requests", type=int, default=200, help="submissions per client")
+    args = parser.parse_args()
+
+    start = threading.Event()
+    results = []
+    threads = [threading.Thread(target=client, args=(args.host, args.port, args.requests, n, start, results))
+               for n in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    started = time.perf_counter()
+    start.set()
+    for thread in threads:
+        thread.join()
+
+    submitted = [request_id for result in results for request_id in result["submitted"]]
+    submit_seconds = max(result["submitted_at"] for result in results) - started
+    submit_ms = [s * 1000 for result in results for s in result["submit_latency"]]
+    status_ms = [s * 1000 for result in results for s in result["status_latency"]]
+
+    print(f"{args.clients} clients x {args.requests} submissions")
+    print(f"Submitted {len(submitted)} in {submit_seconds:.2f} s: {len(submitted) / submit_seconds:,.0f} submissions/sec")
+    print(f"Submit latency: p50 {percentile(submit_ms, 0.5):.2f} ms, p99 {percentile(submit_ms, 0.99):.2f} ms")
+    print(f"Status check latency: p50 {percentile(status_ms, 0.5):.2f} ms, p99 {percentile(status_ms, 0.99):.2f} ms")
+    print(f"Errors: {sum(result['errors'] for result in results)}, "
+          f"duplicate IDs: {len(submitted) - len(set(submitted))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,678 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-from tkcalendar import DateEntry
+from tkinter import ttk, messagebox, filedialog
+import tkinter.font as font
+import csv
+import gzip
+import hashlib
+import itertools
 import json
-import matplotlib.pyplot as plt
+import os
+import queue
+import sqlite3
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from datetime import date as Date, datetime
+from functools import lru_cache
 
-# JSON Database File
+# tkcalendar and matplotlib are imported where they are first used, so that
+# importing this module stays cheap (see startup_benchmark.py)
+
+# SQLite Database File (each change writes only its own row)
+DB_FILE = "finance_data.db"
+# Old JSON Database File, migrated into DB_FILE once; the json_imported row in meta records that it was
 DATA_FILE = "finance_data.json"
 
+db = None  # Connection used on the UI thread, only while loading at startup
+writer = None  # PersistenceWorker that writes every change in the background
+next_id = 1  # Transaction ids are handed out here so the UI never waits for the database
+import_error = None  # Why DATA_FILE could not be imported at the last load, if it could not
+
+
+def open_db():
+    global db, import_error
+    db = sqlite3.connect(DB_FILE)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.execute("CREATE TABLE IF NOT EXISTS transactions ("
+               "id INTEGER PRIMARY KEY, amount REAL NOT NULL, category TEXT NOT NULL, type TEXT NOT NULL, date TEXT NOT NULL)")
+    db.execute("CREATE TABLE IF NOT EXISTS budget (category TEXT PRIMARY KEY, amount REAL NOT NULL)")
+    db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+    db.commit()
+
+    import_error = None
+    if not json_imported() and os.path.exists(DATA_FILE):
+        try:
+            migrate_json()
+        except (OSError, ValueError, KeyError, TypeError, AttributeError, sqlite3.Error) as e:
+            # Nothing was written, so the import is tried again on the next start
+            import_error = f"Could not import {DATA_FILE}: {e}"
+
+
+def json_imported():
+    """Whether DATA_FILE has been imported; migrate_json sets the json_imported marker in meta."""
+    row = db.execute("SELECT value FROM meta WHERE key = 'json_imported'").fetchone()
+    if row is None:
+        # New database (0: still to import), or one from before the marker existed,
+        # which counts as imported once anything has been saved to it
+        saved = db.execute("SELECT EXISTS (SELECT 1 FROM transactions) OR EXISTS (SELECT 1 FROM budget)").fetchone()[0]
+        row = (1 if saved else 0,)
+        with db:
+            db.execute("INSERT INTO meta (key, value) VALUES ('json_imported', ?)", row)
+    return bool(row[0])
+
+
+def migrate_json():
+    # Import the old finance_data.json in one transaction with its marker, keeping the file as a backup
+    with open(DATA_FILE, "r") as file:
+        old_data = json.load(file)
+    transactions = [(t["amount"], t["category"], t["type"], t["date"]) for t in old_data.get("transactions", [])]
+    with db:
+        db.executemany("INSERT INTO transactions (amount, category, type, date) VALUES (?, ?, ?, ?)", transactions)
+        db.executemany("INSERT OR REPLACE INTO budget (category, amount) VALUES (?, ?)", old_data.get("budget", {}).items())
+        db.execute("UPDATE meta SET value = 1 WHERE key = 'json_imported'")
+
 
 def load_data():
-    try:
-        with open(DATA_FILE, "r") as file:
-            return json.load(file)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {"transactions": [], "budget": {}}
+    global db, next_id
+    open_db()
+    transactions = [{"id": row[0], "amount": row[1], "category": row[2], "type": row[3], "date": row[4]}
+                    for row in db.execute("SELECT id, amount, category, type, date FROM transactions ORDER BY id")]
+    budget = dict(db.execute("SELECT category, amount FROM budget"))
+    next_id = (db.execute("SELECT MAX(id) FROM transactions").fetchone()[0] or 0) + 1
+    db.close()
+    db = None
+    return {"transactions": transactions, "budget": budget}
+
+
+class PersistenceWorker:
+    """Write-behind thread that owns its own database connection.
+
+    The UI thread only queues changes. The worker takes everything queued so
+    far, keeps the last change for each transaction id and budget category,
+    and commits the batch as one SQLite transaction with synchronous=FULL, so
+    a committed batch survives a crash and a failed one leaves no partial
+    rows. A failed batch is kept and retried with the next one, even after
+    close(), until it commits. flush() and close() say whether everything
+    reached the disk, so callers can tell a clean shutdown from a lossy one.
+    """
+
+    RETRY_SECONDS = 1.0
+
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.saved = threading.Condition(self.lock)  # Notified after every commit attempt and when the thread ends
+        self.pending = 0  # Changes queued or retrying, not yet committed
+        self.error = None  # Last write error, cleared by the next successful commit
+        self.thread = threading.Thread(target=self.run, name="pfm-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, transactions=None, budgets=None):
+        """Queue {id: transaction, or None to delete} and {category: amount} changes."""
+        transactions = transactions or {}
+        budgets = budgets or {}
+        with self.lock:
+            self.pending += len(transactions) + len(budgets)
+        self.queue.put((transactions, budgets))
+
+    def run(self):
+        try:
+            self.write_changes()
+        except Exception as e:
+            self.error = e  # The thread is gone; flush() and close() report it instead of waiting
+        finally:
+            with self.saved:
+                self.saved.notify_all()
+
+    def write_changes(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        transactions = {}
+        budgets = {}
+        changes = 0
+        stopping = False
+        while not stopping or changes:  # Never stop with changes that have not been committed
+            try:
+                batch = [self.queue.get(timeout=self.RETRY_SECONDS if changes else None)]
+            except queue.Empty:
+                batch = []  # Nothing new, retry the failed batch
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for item in batch:
+                if item is None:
+                    stopping = True
+                    continue
+                transactions.update(item[0])
+                budgets.update(item[1])
+                changes += len(item[0]) + len(item[1])
+
+            if changes:
+                try:
+                    with conn:  # Commits, or rolls back the whole batch on error
+                        conn.executemany("DELETE FROM transactions WHERE id = ?",
+                                         [(t_id,) for t_id, t in transactions.items() if t is None])
+                        conn.executemany("INSERT OR REPLACE INTO transactions (id, amount, category, type, date) VALUES (?, ?, ?, ?, ?)",
+                                         [(t_id, t["amount"], t["category"], t["type"], t["date"])
+                                          for t_id, t in transactions.items() if t is not None])
+                        conn.executemany("INSERT OR REPLACE INTO budget (category, amount) VALUES (?, ?)", budgets.items())
+                    with self.saved:
+                        self.pending -= changes
+                        self.error = None
+                        self.saved.notify_all()
+                    transactions, budgets, changes = {}, {}, 0
+                except Exception as e:  # sqlite3.Error, or a malformed change; kept and retried either way
+                    with self.saved:
+                        self.error = e
+                        self.saved.notify_all()
+        conn.close()
+
+    def flush(self, timeout=None):
+        """Wait until every change queued so far is committed.
+
+        Returns False if that has not happened within timeout seconds, or the
+        worker has died; error then says why.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.saved:
+            while self.pending:
+                if not self.thread.is_alive():
+                    return False
+                wait = self.RETRY_SECONDS if deadline is None else min(deadline - time.monotonic(), self.RETRY_SECONDS)
+                if wait <= 0:
+                    return False
+                self.saved.wait(wait)
+            return True
+
+    def close(self, timeout=None):
+        """Stop the worker once everything queued is committed. Returns whether it has stopped."""
+        self.queue.put(None)
+        self.thread.join(timeout)
+        return not self.thread.is_alive()
+
+
+def start_writer():
+    global writer
+    writer = PersistenceWorker()
+
+
+def insert_transaction(transaction):
+    global next_id
+    transaction["id"] = next_id
+    next_id += 1
+    writer.submit(transactions={transaction["id"]: dict(transaction)})
+
+
+def insert_transactions(transactions):
+    # Queued as one change set, so the worker commits the whole batch together
+    global next_id
+    for transaction in transactions:
+        transaction["id"] = next_id
+        next_id += 1
+    writer.submit(transactions={t["id"]: dict(t) for t in transactions})
+
+
+def update_transaction(transaction):
+    writer.submit(transactions={transaction["id"]: dict(transaction)})
+
+
+def remove_transaction(transaction):
+    writer.submit(transactions={transaction["id"]: None})
+
+
+def save_budget(category, amount):
+    writer.submit(budgets={category: amount})
+
+
+data = {"transactions": [], "budget": {}}  # Filled by FinanceManager on startup, not at import time
+
+
+# Formats tried, in order, when turning a transaction's date text into a day number
+DATE_FORMATS = ("%m/%d/%y", "%m/%d/%Y", "%Y-%m-%d", "%d/%m/%Y", "%d.%m.%Y")
+
+
+@lru_cache(maxsize=None)
+def parse_date(text):
+    """Day ordinal for a date string, or 0 if no known format matches."""
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).toordinal()
+        except ValueError:
+            pass
+    return 0
+
+
+class TransactionIndex:
+    """Date-sorted and per-category indexes over the transactions, for range queries.
+
+    Each index is a sorted list of (day ordinal, id); dates are parsed once,
+    when a transaction is added.
+    """
+
+    def __init__(self, transactions):
+        self.by_id = {}
+        self.days = {}  # id -> day ordinal
+        self.by_date = []
+        self.by_category = {}  # category -> sorted list of (day ordinal, id)
+        for t in transactions:
+            day = parse_date(t["date"])
+            self.by_id[t["id"]] = t
+            self.days[t["id"]] = day
+            self.by_date.append((day, t["id"]))
+            self.by_category.setdefault(t["category"], []).append((day, t["id"]))
+        self.by_date.sort()
+        for entries in self.by_category.values():
+            entries.sort()
+
+    def add(self, t):
+        day = parse_date(t["date"])
+        self.by_id[t["id"]] = t
+        self.days[t["id"]] = day
+        insort(self.by_date, (day, t["id"]))
+        insort(self.by_category.setdefault(t["category"], []), (day, t["id"]))
+
+    def add_many(self, transactions):
+        # Append then re-sort once; cheaper than one insort per row for a bulk import
+        for t in transactions:
+            day = parse_date(t["date"])
+            self.by_id[t["id"]] = t
+            self.days[t["id"]] = day
+            self.by_date.append((day, t["id"]))
+            self.by_category.setdefault(t["category"], []).append((day, t["id"]))
+        self.by_date.sort()
+        for category in {t["category"] for t in transactions}:
+            self.by_category[category].sort()
+
+    def remove(self, t):
+        key = (self.days.pop(t["id"]), t["id"])
+        old = self.by_id.pop(t["id"])
+        del self.by_date[bisect_left(self.by_date, key)]
+        entries = self.by_category[old["category"]]
+        del entries[bisect_left(entries, key)]
+        if not entries:
+            del self.by_category[old["category"]]
+
+    def replace(self, old, new):
+        self.remove(old)
+        self.add(new)
+
+    def entries_between(self, start, end, category):
+        # Binary search for the slice of (day, id) entries between the two dates
+        entries = self.by_date if category is None else self.by_category.get(category, [])
+        low = 0 if start is None else bisect_left(entries, (start.toordinal(),))
+        high = len(entries) if end is None else bisect_right(entries, (end.toordinal(), float("inf")))
+        return entries[low:high]
+
+    def query(self, start=None, end=None, category=None, trans_type=None):
+        """Transactions between two dates (inclusive, date objects), oldest first."""
+        result = (self.by_id[t_id] for _, t_id in self.entries_between(start, end, category))
+        if trans_type is not None:
+            return [t for t in result if t["type"] == trans_type]
+        return list(result)
+
+    def rollup(self, period="month", start=None, end=None, category=None):
+        """{"2024-03": {"Income": x, "Expense": y}, ...} by month or ISO week ("2024-W11"), in date order."""
+        totals = {}
+        label_of = {}  # The label only changes when the day does, and entries are grouped by day
+        for day, t_id in self.entries_between(start, end, category):
+            label = label_of.get(day)
+            if label is None:
+                when = Date.fromordinal(day) if day else None
+                if when is None:
+                    label = "Unknown date"
+                elif period == "week":
+                    year, week, _ = when.isocalendar()
+                    label = f"{year}-W{week:02}"
+                else:
+                    label = f"{when.year}-{when.month:02}"
+                label_of[day] = label
+            t = self.by_id[t_id]
+            period_totals = totals.setdefault(label, {"Income": 0.0, "Expense": 0.0})
+            period_totals[t["type"]] = period_totals.get(t["type"], 0.0) + t["amount"]
+        return totals
+
+
+class TransactionColumns:
+    """NumPy column arrays mirroring the transactions, for vectorized chart aggregations.
+
+    Columns are amount, type code (0 Income, 1 Expense), category code and day
+    ordinal. Deleted rows are only flagged dead until more than half the rows
+    are dead, then the arrays are compacted. numpy is imported on first use.
+    """
+
+    TYPE_CODES = {"Income": 0, "Expense": 1}
+
+    def __init__(self, transactions, days):
+        import numpy as np
+
+        count = len(transactions)
+        capacity = max(count * 2, 1024)
+        self.amount = np.zeros(capacity)
+        self.type_code = np.full(capacity, -1, dtype=np.int8)
+        self.category_code = np.zeros(capacity, dtype=np.int32)
+        self.day = np.zeros(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.categories = []  # code -> category name
+        self.category_codes = {}  # category name -> code
+        self.rows = {}  # transaction id -> row
+        self.size = count
+        self.dead = 0
+
+        self.amount[:count] = np.fromiter((t["amount"] for t in transactions), dtype=float, count=count)
+        self.type_code[:count] = np.fromiter((self.TYPE_CODES.get(t["type"], -1) for t in transactions), dtype=np.int8, count=count)
+        self.category_code[:count] = np.fromiter((self.code_for(t["category"]) for t in transactions), dtype=np.int32, count=count)
+        self.day[:count] = np.fromiter((days[t["id"]] for t in transactions), dtype=np.int32, count=count)
+        self.ids[:count] = np.fromiter((t["id"] for t in transactions), dtype=np.int64, count=count)
+        self.alive[:count] = True
+        self.rows = {t["id"]: row for row, t in enumerate(transactions)}
+
+    def code_for(self, category):
+        code = self.category_codes.get(category)
+        if code is None:
+            code = self.category_codes[category] = len(self.categories)
+            self.categories.append(category)
+        return code
+
+    def write_row(self, row, t, day):
+        self.amount[row] = t["amount"]
+        self.type_code[row] = self.TYPE_CODES.get(t["type"], -1)
+        self.category_code[row] = self.code_for(t["category"])
+        self.day[row] = day
+        self.ids[row] = t["id"]
+        self.alive[row] = True
+        self.rows[t["id"]] = row
+
+    def add(self, t, day):
+        import numpy as np
+
+        if self.size == len(self.amount):
+            grow = len(self.amount)  # Double the capacity so appends stay amortized O(1)
+            self.amount = np.concatenate([self.amount, np.zeros(grow)])
+            self.type_code = np.concatenate([self.type_code, np.full(grow, -1, dtype=np.int8)])
+            self.category_code = np.concatenate([self.category_code, np.zeros(grow, dtype=np.int32)])
+            self.day = np.concatenate([self.day, np.zeros(grow, dtype=np.int32)])
+            self.alive = np.concatenate([self.alive, np.zeros(grow, dtype=bool)])
+            self.ids = np.concatenate([self.ids, np.zeros(grow, dtype=np.int64)])
+        self.write_row(self.size, t, day)
+        self.size += 1
+
+    def replace(self, old, new, day):
+        self.write_row(self.rows.pop(old["id"]), new, day)
+
+    def remove(self, t):
+        self.alive[self.rows.pop(t["id"])] = False
+        self.dead += 1
+        if self.dead * 2 > self.size:
+            self.compact()
+
+    def compact(self):
+        keep = self.alive[:self.size].nonzero()[0]
+        count = len(keep)
+        for column in ("amount", "type_code", "category_code", "day", "ids"):
+            values = getattr(self, column)
+            values[:count] = values[keep]
+        self.alive[:count] = True
+        self.alive[count:] = False
+        self.rows = dict(zip(self.ids[:count].tolist(), range(count)))
+        self.size = count
+        self.dead = 0
 
+    def live(self):
+        # Views of the columns restricted to rows that have not been deleted
+        mask = self.alive[:self.size]
+        return self.amount[:self.size][mask], self.type_code[:self.size][mask], self.category_code[:self.size][mask], self.day[:self.size][mask]
 
-def save_data(data):
-    with open(DATA_FILE, "w") as file:
-        json.dump(data, file, indent=4)
+    def expense_by_category(self):
+        """(category names, totals) for every category with spending."""
+        import numpy as np
 
+        amount, type_code, category_code, _ = self.live()
+        expense = type_code == self.TYPE_CODES["Expense"]
+        totals = np.bincount(category_code[expense], weights=amount[expense], minlength=len(self.categories))
+        spent = totals.nonzero()[0]
+        return [self.categories[code] for code in spent], totals[spent]
 
-data = load_data()
+    def dated(self):
+        # Live rows with a known date, as datetime64 days
+        import numpy as np
+
+        amount, type_code, _, day = self.live()
+        known = day > 0
+        days = (day[known] - Date(1970, 1, 1).toordinal()).astype("datetime64[D]")
+        return amount[known], type_code[known], days
+
+    def by_month(self):
+        """(months as datetime64[M], income per month, expense per month), oldest first."""
+        import numpy as np
+
+        amount, type_code, days = self.dated()
+        months, group = np.unique(days.astype("datetime64[M]"), return_inverse=True)
+        income = np.bincount(group, weights=np.where(type_code == self.TYPE_CODES["Income"], amount, 0), minlength=len(months))
+        expense = np.bincount(group, weights=np.where(type_code == self.TYPE_CODES["Expense"], amount, 0), minlength=len(months))
+        return months, income, expense
+
+    def cumulative_balance(self):
+        """(days as datetime64[D], running balance at the end of each day), oldest first."""
+        import numpy as np
+
+        amount, type_code, days = self.dated()
+        signed = np.where(type_code == self.TYPE_CODES["Income"], amount, np.where(type_code == self.TYPE_CODES["Expense"], -amount, 0))
+        unique_days, group = np.unique(days, return_inverse=True)
+        return unique_days, np.cumsum(np.bincount(group, weights=signed, minlength=len(unique_days)))
+
+
+# CSV export columns: header -> transaction field
+EXPORT_COLUMNS = {"Type": "type", "Category": "category", "Amount (Rwf)": "amount", "Date": "date"}
+IMPORT_CHUNK = 5000  # Statement rows read and checked per step
+
+
+def open_csv(path, mode):
+    # Paths ending in .gz are read and written through gzip
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", newline="", encoding="utf-8")
+    return open(path, mode, newline="", encoding="utf-8-sig" if mode == "r" else "utf-8")
+
+
+def export_transactions(path, transactions, headers):
+    """Stream the transactions to a CSV (gzip if path ends in .gz) with the given EXPORT_COLUMNS headers."""
+    fields = [EXPORT_COLUMNS[h] for h in headers]
+    with open_csv(path, "w") as file:
+        writer = csv.writer(file)
+        writer.writerow(headers)
+        writer.writerows([t[f] for f in fields] for t in transactions)
+
+
+def content_hash(t):
+    # Same day, category, type and amount give the same hash, whatever the date text looks like
+    day = parse_date(t["date"]) or t["date"]
+    key = f"{day}|{t['category'].strip().lower()}|{t['type']}|{t['amount']:.2f}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def read_statement(path, existing):
+    """Read a bank statement CSV in chunks and return (new transactions, duplicates, invalid rows).
+
+    Columns are found by header name: Date, Amount (or "Amount (Rwf)"), Category
+    or Description, and an optional Type; without a Type column, negative
+    amounts are expenses. 'existing' maps content hashes to how many times
+    they are already stored, so a statement line repeated n times on the same
+    day only counts as a duplicate of the first n stored copies.
+    """
+    seen = Counter()
+    new = []
+    duplicates = invalid = 0
+    with open_csv(path, "r") as file:
+        reader = csv.reader(file)
+        header = [h.strip().lower() for h in next(reader, [])]
+
+        def column(*names):
+            for name in names:
+                if name in header:
+                    return header.index(name)
+            return None
+
+        date_col = column("date", "transaction date", "value date")
+        amount_col = column("amount", "amount (rwf)")
+        category_col = column("category", "description", "details")
+        type_col = column("type")
+        if date_col is None or amount_col is None or category_col is None:
+            raise ValueError("The statement needs Date, Amount and Category (or Description) columns.")
+
+        while True:
+            chunk = list(itertools.islice(reader, IMPORT_CHUNK))
+            if not chunk:
+                break
+            for row in chunk:
+                try:
+                    amount = float(row[amount_col].replace(",", ""))
+                    category = row[category_col].strip()
+                    trans_date = row[date_col].strip()
+                    trans_type = row[type_col].strip().title() if type_col is not None else ("Expense" if amount < 0 else "Income")
+                except (IndexError, ValueError):
+                    invalid += 1
+                    continue
+                if not category or not trans_date or trans_type not in ("Income", "Expense"):
+                    invalid += 1
+                    continue
+
+                t = {"amount": abs(amount), "category": category, "type": trans_type, "date": trans_date}
+                key = content_hash(t)
+                seen[key] += 1
+                if seen[key] <= existing.get(key, 0):
+                    duplicates += 1
+                else:
+                    new.append(t)
+    return new, duplicates, invalid
+
+
+def format_transaction(t):
+    return f"{t['type']}: {t['category']} - {t['amount']:,.0f} Rwf on {t['date']}"
+
+
+class TransactionListView:
+    """Listbox over a list of transactions that only holds the rows currently in view.
+
+    Row i of the listbox shows rows[start + i]. Callers report changes with
+    inserted/updated/removed so only the affected visible rows are redrawn.
+    """
+
+    def __init__(self, parent, rows):
+        self.rows = rows
+        self.start = 0  # Position in rows of the first visible line
+        self.visible = 10  # Lines that fit in the listbox, updated when it is resized
+
+        frame = ttk.Frame(parent)
+        frame.pack(pady=10, fill=tk.BOTH, expand=True)
+        self.scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self.scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox = tk.Listbox(frame, height=10)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.listbox.bind("<Configure>", self.on_resize)
+        self.listbox.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.listbox.bind("<Button-4>", self.on_mouse_wheel)
+        self.listbox.bind("<Button-5>", self.on_mouse_wheel)
+        self.render()
+
+    def render(self):
+        # Redraw the whole window; its size does not depend on how many rows there are
+        self.start = min(max(self.start, 0), max(len(self.rows) - self.visible, 0))
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(tk.END, *(format_transaction(t) for t in self.rows[self.start:self.start + self.visible]))
+        self.update_scrollbar()
+
+    def update_scrollbar(self):
+        total = len(self.rows) or 1
+        self.scrollbar.set(self.start / total, min((self.start + self.visible) / total, 1))
+
+    def selected_index(self):
+        """Position in rows of the selected line; raises IndexError when nothing is selected."""
+        return self.start + self.listbox.curselection()[0]
+
+    def inserted(self, index):
+        if self.start <= index < self.start + self.visible:
+            if index == len(self.rows) - 1 and self.listbox.size() < self.visible:
+                self.listbox.insert(tk.END, format_transaction(self.rows[index]))
+                self.update_scrollbar()
+            else:
+                self.render()
+        else:
+            self.update_scrollbar()
+
+    def updated(self, index):
+        if self.start <= index < self.start + self.visible:
+            line = index - self.start
+            self.listbox.delete(line)
+            self.listbox.insert(line, format_transaction(self.rows[index]))
+
+    def removed(self, index):
+        if index < self.start:
+            self.start -= 1  # Keep the same rows in view
+            self.update_scrollbar()
+        elif index < self.start + self.visible:
+            self.render()
+        else:
+            self.update_scrollbar()
+
+    def show(self, index):
+        if not self.start <= index < self.start + self.visible:
+            self.start = index - self.visible // 2
+            self.render()
+
+    def scroll(self, action, amount, unit=None):
+        # Scrollbar command: ("moveto", fraction) or ("scroll", n, "units"/"pages")
+        if action == "moveto":
+            self.start = int(float(amount) * len(self.rows))
+        elif unit == "pages":
+            self.start += int(amount) * self.visible
+        else:
+            self.start += int(amount)
+        self.render()
+
+    def on_mouse_wheel(self, event):
+        self.scroll("scroll", -3 if event.num == 4 or event.delta > 0 else 3, "units")
+        return "break"
+
+    def on_resize(self, event):
+        line_height = font.nametofont(self.listbox.cget("font")).metrics("linespace") + 1
+        visible = max(event.height // line_height, 1)
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
 
 
 class FinanceManager:
     def __init__(self, root):
+        global data
+        from tkcalendar import DateEntry
+
+        data = load_data()
+        start_writer()
+        if import_error:
+            messagebox.showwarning("Import Failed", f"{import_error}\nIt will be tried again next time.")
         self.root = root
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.root.title("Personal Finance Manager")
         self.root.geometry("600x600")
 
         self.dark_mode = False  # Dark mode flag
 
+        # Running totals, kept in step with every add, edit and delete
+        self.totals = {"Income": 0.0, "Expense": 0.0}
+        self.category_expense = {}  # category -> total spent
+        self.rebuild_totals()
+        self.index = TransactionIndex(data["transactions"])
+        self.columns = None  # TransactionColumns, built the first time a chart is shown
+        self.edit_button = None  # "Save Edited Transaction" button while an edit is open
+
         # Title Label
         ttk.Label(root, text="Personal Finance Manager", font=("Arial", 16, "bold")).pack(pady=10)
 
@@ -64,7 +705,10 @@ class FinanceManager:
         # Balance and Chart Buttons
         ttk.Button(root, text="Show Balance", command=self.show_balance).pack(pady=5)
         ttk.Button(root, text="Show Expense Chart", command=self.show_chart).pack(pady=5)
+        ttk.Button(root, text="Show Trend Chart", command=self.show_trend_chart).pack(pady=5)
+        ttk.Button(root, text="Monthly Summary", command=self.show_monthly_summary).pack(pady=5)
         ttk.Button(root, text="Export to CSV", command=self.export_csv).pack(pady=5)
+        ttk.Button(root, text="Import Bank Statement", command=self.import_statement).pack(pady=5)
         ttk.Button(root, text="Toggle Dark Mode", command=self.toggle_dark_mode).pack(pady=5)
 
         # Delete and Edit Buttons
@@ -72,9 +716,12 @@ class FinanceManager:
         ttk.Button(root, text="Edit Transaction", command=self.edit_transaction).pack(pady=5)
 
         # Transactions List
-        self.transactions_list = tk.Listbox(root, height=10)
-        self.transactions_list.pack(pady=10, fill=tk.BOTH, expand=True)
-        self.load_transactions()
+        self.transactions_list = TransactionListView(root, data["transactions"])
+
+        # Save indicator, refreshed from the background writer
+        self.save_status = ttk.Label(root, text="All changes saved")
+        self.save_status.pack(pady=(0, 5))
+        self.poll_writer()
 
     def add_transaction(self):
         amount = self.amount_entry.get()
@@ -88,33 +735,54 @@ class FinanceManager:
 
         try:
             amount = float(amount)
-            data["transactions"].append({"amount": amount, "category": category, "type": trans_type, "date": date})
-            save_data(data)
-            self.transactions_list.insert(tk.END, f"{trans_type}: {category} - {amount:,.0f} Rwf on {date}")
+            transaction = {"amount": amount, "category": category, "type": trans_type, "date": date}
+            insert_transaction(transaction)
+            data["transactions"].append(transaction)
+            self.apply_totals(transaction, 1)
+            self.index.add(transaction)
+            if self.columns is not None:
+                self.columns.add(transaction, self.index.days[transaction["id"]])
+            self.transactions_list.inserted(len(data["transactions"]) - 1)
             self.check_budget_alert(category)
             self.amount_entry.delete(0, tk.END)
             self.category_entry.delete(0, tk.END)
         except ValueError:
             messagebox.showerror("Error", "Invalid amount!")
 
+    def rebuild_totals(self):
+        # Full pass over the transactions, only needed once at load
+        self.totals = {"Income": 0.0, "Expense": 0.0}
+        self.category_expense = {}
+        for t in data["transactions"]:
+            self.apply_totals(t, 1)
+
+    def apply_totals(self, transaction, sign):
+        # sign is 1 when a transaction is added and -1 when it is removed
+        amount = sign * transaction["amount"]
+        self.totals[transaction["type"]] = self.totals.get(transaction["type"], 0.0) + amount
+        if transaction["type"] == "Expense":
+            self.category_expense[transaction["category"]] = self.category_expense.get(transaction["category"], 0.0) + amount
+
     def show_balance(self):
-        income = sum(t["amount"] for t in data["transactions"] if t["type"] == "Income")
-        expense = sum(t["amount"] for t in data["transactions"] if t["type"] == "Expense")
+        income = self.totals["Income"]
+        expense = self.totals["Expense"]
         balance = income - expense
         messagebox.showinfo("Balance", f"Total Income: {income:,.0f} Rwf\nTotal Expense: {expense:,.0f} Rwf\nBalance: {balance:,.0f} Rwf")
 
+    def get_columns(self):
+        if self.columns is None:
+            self.columns = TransactionColumns(data["transactions"], self.index.days)
+        return self.columns
+
     def show_chart(self):
-        expenses = [t for t in data["transactions"] if t["type"] == "Expense"]
-        if not expenses:
+        categories, totals = self.get_columns().expense_by_category()
+        if not categories:
             messagebox.showinfo("No Data", "No expense data to display!")
             return
 
-        categories = {}
-        for t in expenses:
-            categories[t["category"]] = categories.get(t["category"], 0) + t["amount"]
-
+        import matplotlib.pyplot as plt
         plt.figure(figsize=(6, 4))
-        plt.bar(categories.keys(), categories.values(), color="red")
+        plt.bar(categories, totals, color="red")
         plt.xlabel("Categories")
         plt.ylabel("Amount Spent (Rwf)")
         plt.title("Expenses by Category")
@@ -122,14 +790,123 @@ class FinanceManager:
         plt.tight_layout()
         plt.show()
 
+    def show_trend_chart(self):
+        columns = self.get_columns()
+        months, income, expense = columns.by_month()
+        if not len(months):
+            messagebox.showinfo("No Data", "No dated transactions to display!")
+            return
+        days, balance = columns.cumulative_balance()
+
+        import matplotlib.pyplot as plt
+        figure, (monthly, running) = plt.subplots(2, 1, figsize=(7, 6))
+        positions = range(len(months))
+        monthly.bar([p - 0.2 for p in positions], income, width=0.4, color="green", label="Income")
+        monthly.bar([p + 0.2 for p in positions], expense, width=0.4, color="red", label="Expense")
+        monthly.set_xticks(list(positions))
+        monthly.set_xticklabels([str(m) for m in months], rotation=45)
+        monthly.set_ylabel("Amount (Rwf)")
+        monthly.set_title("Income vs Expense by Month")
+        monthly.legend()
+        running.plot(days, balance, color="blue")
+        running.set_ylabel("Balance (Rwf)")
+        running.set_title("Balance Over Time")
+        figure.tight_layout()
+        plt.show()
+
+    def show_monthly_summary(self):
+        # Last 12 months, optionally for the category typed in the Category field
+        category = self.category_entry.get() or None
+        today = Date.today()
+        year, month = (today.year, today.month - 11) if today.month == 12 else (today.year - 1, today.month + 1)
+        first_month = Date(year, month, 1)
+        summary = self.index.rollup("month", start=first_month, end=today, category=category)
+        if not summary:
+            messagebox.showinfo("No Data", "No transactions in the last 12 months!")
+            return
+        lines = [f"{month}: +{totals['Income']:,.0f} / -{totals['Expense']:,.0f} Rwf" for month, totals in summary.items()]
+        title = f"Monthly Summary - {category}" if category else "Monthly Summary"
+        messagebox.showinfo(title, "\n".join(lines))
+
     def export_csv(self):
-        import csv
-        with open("transactions.csv", "w", newline="") as file:
-            writer = csv.writer(file)
-            writer.writerow(["Type", "Category", "Amount (Rwf)", "Date"])
-            for t in data["transactions"]:
-                writer.writerow([t["type"], t["category"], t["amount"], t["date"]])
-        messagebox.showinfo("Export Successful", "Transactions exported to transactions.csv")
+        # Small dialog to choose columns and filters before picking the file
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Export to CSV")
+
+        ttk.Label(dialog, text="Columns:").pack(anchor="w", padx=10, pady=(10, 0))
+        column_vars = {}
+        for header in EXPORT_COLUMNS:
+            column_vars[header] = tk.BooleanVar(value=True)
+            ttk.Checkbutton(dialog, text=header, variable=column_vars[header]).pack(anchor="w", padx=20)
+
+        ttk.Label(dialog, text="Category (blank for all):").pack(anchor="w", padx=10, pady=(10, 0))
+        category_entry = ttk.Entry(dialog)
+        category_entry.pack(fill=tk.X, padx=10)
+
+        ttk.Label(dialog, text="Type:").pack(anchor="w", padx=10, pady=(10, 0))
+        type_box = ttk.Combobox(dialog, values=["All", "Income", "Expense"], state="readonly")
+        type_box.set("All")
+        type_box.pack(fill=tk.X, padx=10)
+
+        ttk.Label(dialog, text="From / To date (YYYY-MM-DD, blank for no limit):").pack(anchor="w", padx=10, pady=(10, 0))
+        start_entry = ttk.Entry(dialog)
+        start_entry.pack(fill=tk.X, padx=10)
+        end_entry = ttk.Entry(dialog)
+        end_entry.pack(fill=tk.X, padx=10)
+
+        def run_export():
+            headers = [h for h, var in column_vars.items() if var.get()]
+            if not headers:
+                messagebox.showwarning("Warning", "Choose at least one column!", parent=dialog)
+                return
+            try:
+                start = datetime.strptime(start_entry.get(), "%Y-%m-%d").date() if start_entry.get() else None
+                end = datetime.strptime(end_entry.get(), "%Y-%m-%d").date() if end_entry.get() else None
+            except ValueError:
+                messagebox.showerror("Error", "Dates must look like 2024-03-31!", parent=dialog)
+                return
+            path = filedialog.asksaveasfilename(parent=dialog, initialfile="transactions.csv", defaultextension=".csv",
+                                                filetypes=[("CSV", "*.csv"), ("Compressed CSV", "*.csv.gz")])
+            if not path:
+                return
+
+            if start is None and end is None and not category_entry.get() and type_box.get() == "All":
+                transactions = data["transactions"]
+            else:
+                transactions = self.index.query(start, end, category_entry.get() or None,
+                                                None if type_box.get() == "All" else type_box.get())
+            try:
+                export_transactions(path, transactions, headers)
+            except OSError as e:
+                messagebox.showerror("Error", f"Could not export: {e}", parent=dialog)
+                return
+            dialog.destroy()
+            messagebox.showinfo("Export Successful", f"{len(transactions)} transactions exported to {path}")
+
+        ttk.Button(dialog, text="Export", command=run_export).pack(pady=10)
+
+    def import_statement(self):
+        path = filedialog.askopenfilename(title="Select a bank statement",
+                                          filetypes=[("CSV", "*.csv *.csv.gz"), ("All files", "*.*")])
+        if not path:
+            return
+
+        existing = Counter(content_hash(t) for t in data["transactions"])
+        try:
+            new, duplicates, invalid = read_statement(path, existing)
+            insert_transactions(new)
+        except (OSError, UnicodeDecodeError, csv.Error, ValueError) as e:
+            messagebox.showerror("Error", f"Could not import statement: {e}")
+            return
+
+        # One pass to bring the in-memory views up to date with the whole batch
+        data["transactions"].extend(new)
+        for t in new:
+            self.apply_totals(t, 1)
+        self.index.add_many(new)
+        self.columns = None  # Rebuilt from the index on the next chart
+        self.transactions_list.render()
+        messagebox.showinfo("Import Complete", f"Imported: {len(new)}\nDuplicates skipped: {duplicates}\nInvalid rows skipped: {invalid}")
 
     def set_budget(self):
         category = self.category_entry.get()
@@ -141,45 +918,73 @@ class FinanceManager:
 
         try:
             data["budget"][category] = float(budget)
-            save_data(data)
+            save_budget(category, float(budget))
             messagebox.showinfo("Success", f"Budget set for {category}: {float(budget):,.0f} Rwf")
         except ValueError:
             messagebox.showerror("Error", "Invalid budget amount!")
 
     def check_budget_alert(self, category):
         if category in data["budget"]:
-            total_spent = sum(
-                t["amount"] for t in data["transactions"] if t["category"] == category and t["type"] == "Expense")
+            total_spent = self.category_expense.get(category, 0.0)
             if total_spent > data["budget"][category]:
                 messagebox.showwarning("Budget Exceeded", f"You have exceeded the budget for {category}!")
 
+    def poll_writer(self):
+        if not writer.thread.is_alive():
+            self.save_status.config(text=f"Saving stopped: {writer.error}")
+            return
+        if writer.error is not None:
+            self.save_status.config(text=f"Save failed, retrying: {writer.error}")
+        elif writer.pending:
+            self.save_status.config(text=f"Saving {writer.pending} change(s)...")
+        else:
+            self.save_status.config(text="All changes saved")
+        self.root.after(250, self.poll_writer)
+
+    def on_close(self):
+        # Only close once the writer has committed everything queued, or the user accepts losing it
+        while not writer.flush(timeout=5):
+            reason = f": {writer.error}" if writer.error is not None else " yet"
+            if messagebox.askretrycancel("Save Failed", f"{writer.pending} change(s) could not be saved{reason}\n\nKeep trying?"):
+                continue
+            if messagebox.askyesno("Unsaved Changes", "Close anyway and lose the unsaved changes?", icon="warning"):
+                break
+            return  # Keep the window open; the writer keeps retrying
+        else:
+            writer.close()
+        self.root.destroy()
+
+    def close_edit(self):
+        if self.edit_button is not None:
+            self.edit_button.destroy()
+            self.edit_button = None
+
     def toggle_dark_mode(self):
         self.dark_mode = not self.dark_mode
         self.root.configure(bg="black" if self.dark_mode else "white")
 
-    def load_transactions(self):
-        self.transactions_list.delete(0, tk.END)
-        for trans in data["transactions"]:
-            self.transactions_list.insert(tk.END,
-                                          f"{trans['type']}: {trans['category']} - {trans['amount']:,.0f} Rwf on {trans['date']}")
-
     def delete_transaction(self):
         try:
-            selected_index = self.transactions_list.curselection()[0]
+            selected_index = self.transactions_list.selected_index()
             selected_transaction = data["transactions"][selected_index]
             confirm = messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete this transaction?\n{selected_transaction}")
             if confirm:
+                remove_transaction(selected_transaction)
                 del data["transactions"][selected_index]
-                save_data(data)
-                self.load_transactions()
+                self.apply_totals(selected_transaction, -1)
+                self.index.remove(selected_transaction)
+                if self.columns is not None:
+                    self.columns.remove(selected_transaction)
+                self.transactions_list.removed(selected_index)
                 messagebox.showinfo("Success", "Transaction deleted successfully.")
         except IndexError:
             messagebox.showwarning("No Selection", "Please select a transaction to delete.")
 
     def edit_transaction(self):
         try:
-            selected_index = self.transactions_list.curselection()[0]
+            selected_index = self.transactions_list.selected_index()
             selected_transaction = data["transactions"][selected_index]
+            edited_id = selected_transaction["id"]
 
             # Pre-fill current transaction data
             self.amount_entry.delete(0, tk.END)
@@ -204,16 +1009,29 @@ class FinanceManager:
 
                 try:
                     amount = float(amount)
-                    data["transactions"][selected_index] = {"amount": amount, "category": category, "type": trans_type, "date": date}
-                    save_data(data)
-                    self.load_transactions()
+                    if selected_index >= len(data["transactions"]) or data["transactions"][selected_index]["id"] != edited_id:
+                        # An add or delete since the edit started has moved the transaction
+                        messagebox.showwarning("Warning", "The list has changed; select the transaction and edit it again.")
+                        self.close_edit()
+                        return
+                    old_transaction = data["transactions"][selected_index]  # May already be a previous save of this edit
+                    transaction = {"id": old_transaction["id"], "amount": amount, "category": category, "type": trans_type, "date": date}
+                    update_transaction(transaction)
+                    data["transactions"][selected_index] = transaction
+                    self.apply_totals(old_transaction, -1)
+                    self.apply_totals(transaction, 1)
+                    self.index.replace(old_transaction, transaction)
+                    if self.columns is not None:
+                        self.columns.replace(old_transaction, transaction, self.index.days[transaction["id"]])
+                    self.transactions_list.updated(selected_index)
                     messagebox.showinfo("Success", "Transaction edited successfully.")
                 except ValueError:
                     messagebox.showerror("Error", "Invalid amount!")
 
-            # Save edited transaction
-            edit_button = ttk.Button(self.root, text="Save Edited Transaction", command=save_edited_transaction)
-            edit_button.pack(pady=5)
+            # Save edited transaction, replacing the button of any edit left open
+            self.close_edit()
+            self.edit_button = ttk.Button(self.root, text="Save Edited Transaction", command=save_edited_transaction)
+            self.edit_button.pack(pady=5)
 
         except IndexError:
             messagebox.showwarning("No Selection", "Please select a transaction to edit.")
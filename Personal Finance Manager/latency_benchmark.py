@@ -0,0 +1,80 @@
+"""Click-to-responsive latency benchmark for PFM.py saves.
+
+Times what an "Add Transaction" click costs the UI thread, on a throwaway
+database seeded with --rows transactions:
+
+  sync          an INSERT plus a durable commit on the UI thread (the old path)
+  write-behind  PFM.insert_transaction(), which only queues the change
+
+and then how long the background writer needs to make the queued adds durable.
+
+    python latency_benchmark.py --rows 100000 --clicks 500
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import PFM
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def report(name, samples):
+    ms = [s * 1000 for s in samples]
+    print(f"{name:>13}: p50 {percentile(ms, 0.5):7.3f} ms   p99 {percentile(ms, 0.99):7.3f} ms   max {max(ms):7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how long a PFM save blocks the UI thread.")
+    parser.add_argument("--rows", type=int, default=100000, help="transactions already in the database")
+    parser.add_argument("--clicks", type=int, default=500, help="adds to time")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        os.chdir(folder)
+        PFM.load_data()  # Creates the schema
+        seed = sqlite3.connect(PFM.DB_FILE)
+        seed.executemany("INSERT INTO transactions (amount, category, type, date) VALUES (?, ?, ?, ?)",
+                         ((i % 500, f"Category {i % 40}", "Expense", "1/15/24") for i in range(args.rows)))
+        seed.commit()
+        seed.close()
+
+        sync = sqlite3.connect(PFM.DB_FILE)
+        sync.execute("PRAGMA synchronous=FULL")
+        sync_samples = []
+        for i in range(args.clicks):
+            started = time.perf_counter()
+            sync.execute("INSERT INTO transactions (amount, category, type, date) VALUES (?, ?, ?, ?)",
+                         (i, "Food", "Expense", "1/16/24"))
+            sync.commit()
+            sync_samples.append(time.perf_counter() - started)
+        sync.close()
+
+        PFM.load_data()
+        PFM.start_writer()
+        queued_samples = []
+        started_all = time.perf_counter()
+        for i in range(args.clicks):
+            started = time.perf_counter()
+            PFM.insert_transaction({"amount": i, "category": "Food", "type": "Expense", "date": "1/17/24"})
+            queued_samples.append(time.perf_counter() - started)
+        PFM.writer.flush()
+        drained = time.perf_counter() - started_all
+        PFM.writer.close()
+        os.chdir(os.path.dirname(folder))
+
+    print(f"{args.clicks} adds on a database of {args.rows} transactions")
+    report("sync", sync_samples)
+    report("write-behind", queued_samples)
+    print(f"Background writer made all {args.clicks} adds durable in {drained * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Startup-time benchmark for PFM.py.
+
+Runs `python -X importtime -c "import PFM"` in a fresh interpreter a few
+times, then reports the import time of PFM itself, the slowest modules it
+pulled in, and how long load_data() takes on a copy of the current database
+(or of an old finance_data.json), so the working directory is left untouched.
+
+    python startup_benchmark.py            # report only
+    python startup_benchmark.py --max-ms 150  # also fail if the import gets slower
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def import_times():
+    # Returns {module: cumulative microseconds} parsed from one -X importtime run
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import PFM"],
+                            cwd=HERE, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[module.strip()] = int(cumulative)
+    return times
+
+
+def load_time():
+    sys.path.insert(0, HERE)
+    import PFM
+
+    source = os.getcwd()
+    with tempfile.TemporaryDirectory() as folder:
+        if os.path.exists(PFM.DB_FILE):
+            # The backup API gives a consistent copy, including anything still in the WAL
+            original = sqlite3.connect(PFM.DB_FILE)
+            copy = sqlite3.connect(os.path.join(folder, PFM.DB_FILE))
+            original.backup(copy)
+            copy.close()
+            original.close()
+        elif os.path.exists(PFM.DATA_FILE):
+            shutil.copy(PFM.DATA_FILE, folder)
+        os.chdir(folder)
+        try:
+            started = time.perf_counter()
+            data = PFM.load_data()
+            return time.perf_counter() - started, len(data["transactions"])
+        finally:
+            os.chdir(source)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure PFM.py startup time.")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to time (default 5)")
+    parser.add_argument("--max-ms", type=float, help="exit with an error if the best import of PFM is slower")
+    args = parser.parse_args()
+
+    runs = [import_times() for _ in range(args.runs)]
+    best = min(runs, key=lambda times: times["PFM"])
+    best_ms = best["PFM"] / 1000
+
+    all_ms = ", ".join(f"{times['PFM'] / 1000:.1f}" for times in runs)
+    print(f"import PFM: best {best_ms:.1f} ms over {args.runs} runs (all: {all_ms} ms)")
+    print("Slowest modules imported (cumulative):")
+    others = [(module, cumulative) for module, cumulative in best.items() if module != "PFM"]
+    for module, cumulative in sorted(others, key=lambda item: item[1], reverse=True)[:10]:
+        print(f"  {cumulative / 1000:8.1f} ms  {module}")
+    for heavy in ("matplotlib", "tkcalendar"):
+        if heavy in best:
+            print(f"WARNING: {heavy} is imported at startup")
+
+    seconds, count = load_time()
+    print(f"load_data(): {seconds * 1000:.1f} ms for {count} transactions")
+
+    if args.max_ms is not None and best_ms > args.max_ms:
+        print(f"FAIL: import PFM took {best_ms:.1f} ms, limit is {args.max_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
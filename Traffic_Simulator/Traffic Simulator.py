@@ -1,61 +1,106 @@
+import argparse
+import math
+import time
 import tkinter as tk
 
+from traffic_engine import TrafficEngine
+from traffic_queues import GREEN, VehicleQueues
+
 class TrafficLight:
-    def __init__(self, color):
-        # Initialize the traffic light with a given color and default state
-        self.color = color
-        self.state = "white"  # Current state of the light
-        self.light_state = {"red": "gray", "yellow": "gray", "green": "gray"}  # Light colors initially set to gray
-        self.remaining_time = 4  # Set initial countdown time
+    def __init__(self, engine, index):
+        # A view of one intersection in the engine, for the window to draw
+        self.engine = engine
+        self.index = index
+
+    @property
+    def state(self):
+        # Current state of the light ("white" until its first red)
+        return self.engine.state(self.index)
+
+    @property
+    def remaining_time(self):
+        return int(self.engine.remaining[self.index])
+
+    @property
+    def light_state(self):
+        # Light colors: the current state lit, the others gray
+        state = self.state
+        return {color: color if color == state else "gray" for color in ("red", "yellow", "green")}
 
     def change_state(self):
-        # Change the state of the traffic light based on the current state
-        if self.state == "red":
-            # Transition from red to green
-            self.state = "green"
-            self.light_state = {"red": "gray", "yellow": "gray", "green": "green"}
-            self.remaining_time = 15  # Set countdown for green light
-        elif self.state == "green":
-            # Transition from green to yellow
-            self.state = "yellow"
-            self.light_state = {"red": "gray", "yellow": "yellow", "green": "gray"}
-            self.remaining_time = 6  # Set countdown for yellow light
-        else:
-            # Transition from yellow to red
-            self.state = "red"
-            self.light_state = {"red": "red", "yellow": "gray", "green": "gray"}
-            self.remaining_time = 10  # Set countdown for red light
-
-    def update_countdown(self, label):
-        # Update the countdown timer and change the state when time is up
-        if self.remaining_time >= 0:
-            # Update the label with the remaining time and the current state color
-            label.config(text=str(self.remaining_time), fg=self.state)
-            self.remaining_time -= 1  # Decrement remaining time
-            # Schedule the countdown to update again after 1000 ms (1 second)
-            label.after(1000, self.update_countdown, label)
-        else:
-            # Change the state of the traffic light when countdown reaches zero
-            self.change_state()
-            # Restart the countdown process
-            label.after(1, self.update_countdown, label)
+        # Move on to the next state (red -> green -> yellow -> red) with a full countdown
+        self.engine.change_state(self.index)
+
+
+class TickScheduler:
+    """One after() chain that advances the whole engine on a shared clock.
+
+    Ticks are due at fixed offsets from the start time rather than one second
+    after the previous callback, so the lights never drift apart. speed
+    scales playback (60 plays a simulated minute every second). Ticks that
+    are due together, because Tk fell behind or the speed is high, are
+    fast-forwarded in one step and the lights redrawn once. queues, a
+    VehicleQueues over the same engine, is stepped after every round so
+    its vehicles follow the lights through ticks and fast-forwards alike.
+    """
+
+    MIN_FRAME_MS = 33  # Never wake Tk more often than about 30 times a second
+
+    def __init__(self, master, engine, redraw, speed=1.0, queues=None):
+        self.master = master
+        self.engine = engine
+        self.redraw = redraw  # Called once after each round of ticks
+        self.queues = queues
+        if not (speed > 0 and math.isfinite(speed)):
+            raise ValueError("speed must be a number greater than 0")
+        self.speed = speed  # Simulated seconds per real second
+        self.ticks = 0  # Ticks applied since start()
+
+    def start(self):
+        self.started = time.monotonic()
+        self.redraw()
+        self.schedule()
+
+    def schedule(self):
+        # Wait until the next tick is due on the shared clock (rounded up, so Tk never wakes early)
+        due = self.started + (self.ticks + 1) / self.speed
+        self.master.after(max(math.ceil((due - time.monotonic()) * 1000), self.MIN_FRAME_MS), self.run)
+
+    def run(self):
+        due_ticks = int((time.monotonic() - self.started) * self.speed)
+        if due_ticks > self.ticks:
+            if due_ticks - self.ticks == 1:
+                self.engine.tick()
+            else:
+                self.engine.advance(due_ticks - self.ticks)  # Jump straight through the missed seconds
+            if self.queues is not None:
+                self.queues.step()
+            self.ticks = due_ticks
+            self.redraw()
+        self.schedule()
 
 class TrafficLightApp:
-    def __init__(self, master):
-        # Initialize the main application window
+    def __init__(self, master, engine=None, shown=3, speed=1.0, queues=None):
+        # Initialize the main application window, a viewer over the first few intersections of the engine
         self.master = master
+        # Three intersections by default, dark for 4 seconds before their first red
+        self.engine = engine if engine is not None else TrafficEngine(3, start_delay=4)
+        # Vehicles queued at the same intersections, moved on by the same scheduler
+        self.queues = queues if queues is not None else VehicleQueues(self.engine)
         self.master.title("Traffic Light Simulator created by PRINCE")  # Set window title
         self.master.configure(bg="black")  # Set background color
 
         self.traffic_lights = []  # List to hold the traffic light instances
 
-        # Create three traffic lights (red, yellow, green) and their frames
-        for i, color in enumerate(["red", "yellow", "green"]):
-            light = TrafficLight(color)  # Create a TrafficLight instance
+        # Create a traffic light and its frame for each intersection shown
+        for i in range(min(shown, self.engine.count)):
+            light = TrafficLight(self.engine, i)  # Create a view of intersection i
             self.traffic_lights.append(light)  # Add it to the list
             self.create_light_frame(i, light)  # Create a visual frame for the light
 
-        self.update_lights()  # Start updating the light states visually
+        # A single scheduler advances the whole engine and then redraws what changed on screen
+        self.scheduler = TickScheduler(self.master, self.engine, self.update_lights, speed, self.queues)
+        self.scheduler.start()
 
     def create_light_frame(self, index, traffic_light):
         # Create a frame for each traffic light with its visual components
@@ -73,27 +118,60 @@ class TrafficLightApp:
             "yellow": light_canvas.create_oval(25, 125, 75, 175, fill="gray"),
             "green": light_canvas.create_oval(25, 225, 75, 275, fill="gray"),
         }
+        # Colors currently drawn on the canvas, so only changes are sent to Tk
+        traffic_light.drawn = {"red": "gray", "yellow": "gray", "green": "gray"}
 
         # Create a countdown label to display remaining time
         countdown_label = tk.Label(frame, text="", font=("Arial", 16), fg="white", bg="black")
         countdown_label.pack()  # Pack the label into the frame
+        traffic_light.countdown_label = countdown_label
+        traffic_light.drawn_countdown = ("", "white")  # Text and color shown on the label
+
+        # Create a label for the vehicles queued on each street
+        queue_label = tk.Label(frame, text="", font=("Arial", 10), fg="white", bg="black")
+        queue_label.pack()
+        traffic_light.queue_label = queue_label
+        traffic_light.drawn_queues = ""
 
-        # Start the countdown timer for this traffic light
-        traffic_light.update_countdown(countdown_label)
+    def queue_text(self, lengths, index):
+        # Vehicles queued on each street of one intersection; the main street moves on green
+        return "  ".join(f"{'Main' if street.phase == GREEN else 'Cross'} {int(lengths[street.rows, index].sum())}"
+                         for street in self.queues.streets)
 
     def update_lights(self):
-        # Update the colors of the traffic lights based on their current state
+        # Redraw only the ovals and labels whose state changed since the last tick
+        lengths = self.queues.queue_lengths()
         for light in self.traffic_lights:
-            colors = light.light_state  # Get the current light states
-            for color, state in colors.items():
-                # Update the color of the corresponding shape in the canvas
-                light.light_canvas.itemconfig(light.shape[color], fill=state)
+            for color, state in light.light_state.items():
+                if light.drawn[color] != state:
+                    light.light_canvas.itemconfig(light.shape[color], fill=state)
+                    light.drawn[color] = state
+            countdown = (str(light.remaining_time), light.state)
+            if light.drawn_countdown != countdown:
+                light.countdown_label.config(text=countdown[0], fg=countdown[1])
+                light.drawn_countdown = countdown
+            queued = self.queue_text(lengths, light.index)
+            if light.drawn_queues != queued:
+                light.queue_label.config(text=queued)
+                light.drawn_queues = queued
 
-        # Schedule the update_lights method to run every 1000 ms (1 second)
-        self.master.after(1000, self.update_lights)
+def positive_speed(text):
+    # argparse type for --speed: a playback rate must move time forward
+    speed = float(text)
+    if not (speed > 0 and math.isfinite(speed)):
+        raise argparse.ArgumentTypeError("speed must be a number greater than 0")
+    return speed
 
 # Main execution starts here
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Traffic Light Simulator")
+    parser.add_argument("--intersections", type=int, default=3, help="intersections simulated by the engine")
+    parser.add_argument("--show", type=int, default=3, help="intersections drawn in the window")
+    parser.add_argument("--speed", type=positive_speed, default=1.0, help="simulated seconds per real second (1 is real time)")
+    args = parser.parse_args()
+
     root = tk.Tk()  # Create the main window
-    app = TrafficLightApp(root)  # Initialize the traffic light application
+    engine = TrafficEngine(args.intersections, start_delay=4)
+    queues = VehicleQueues(engine)  # Vehicles waiting at every intersection, shown under each light
+    app = TrafficLightApp(root, engine, args.show, args.speed, queues)  # Initialize the traffic light application
     root.mainloop()  # Run the application event loop
\ No newline at end of file
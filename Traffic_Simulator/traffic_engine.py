@@ -0,0 +1,117 @@
+import argparse
+import time
+
+import numpy as np
+
+PHASES = ("red", "green", "yellow")  # Phase order, as in TrafficLight.change_state
+DEFAULT_PLAN = (10, 15, 6)  # Countdown in seconds for each phase
+DARK = -1  # Phase of a signal that has not started its first red yet
+
+
+class TrafficEngine:
+    """Signal phases and countdowns for many intersections, held in NumPy arrays with no Tk dependency.
+
+    phase[i] indexes PHASES (or is DARK) and remaining[i] is the countdown shown
+    for intersection i. As with the original lights, a phase counts down from
+    its duration to 0 and changes on the next tick, so it lasts duration + 1
+    ticks. plan is one duration per phase, shared by every intersection or
+    given per intersection as a (count, phases) array. start_delay keeps
+    signals dark for that many seconds before their first red, which also
+    staggers their cycles when it varies between intersections.
+    """
+
+    def __init__(self, count, plan=DEFAULT_PLAN, start_delay=0):
+        self.count = count
+        self.durations = np.broadcast_to(np.asarray(plan, dtype=np.int32), (count, len(PHASES)))
+        start_delay = np.broadcast_to(np.asarray(start_delay, dtype=np.int32), (count,))
+        waiting = start_delay > 0
+        self.phase = np.where(waiting, DARK, 0).astype(np.int8)
+        self.remaining = np.where(waiting, start_delay, self.durations[:, 0]).astype(np.int32)
+        self.time = 0  # Ticks since the start
+
+    def change_state(self, indices):
+        """Move the given intersections to their next phase with a full countdown."""
+        phase = (self.phase[indices] + 1) % len(PHASES)  # DARK moves on to red
+        self.phase[indices] = phase
+        self.remaining[indices] = self.durations[indices, phase]
+
+    def tick(self):
+        """Advance every intersection by one second. Returns the indices that changed phase."""
+        self.remaining -= 1
+        changed = np.flatnonzero(self.remaining < 0)
+        if len(changed):
+            self.change_state(changed)
+        self.time += 1
+        return changed
+
+    def advance(self, seconds):
+        """Fast-forward by a number of seconds; the result is the same as calling tick() that many times.
+
+        Rather than counting down, every intersection jumps straight to its
+        next phase change while that change falls inside the window. Whole
+        cycles leave a signal where it was, so after its first change each
+        intersection skips all the whole cycles that fit in one step, and the
+        cost no longer depends on how far ahead it goes. Returns the number
+        of phase changes made.
+        """
+        end = self.time + seconds
+        due = self.time + self.remaining.astype(np.int64) + 1  # When each intersection next changes
+        cycle = self.durations.sum(axis=1, dtype=np.int64) + len(PHASES)  # Ticks per full cycle
+        skipped = np.zeros(self.count, dtype=bool)
+        changes = 0
+        while True:
+            changing = np.flatnonzero(due <= end)
+            if not len(changing):
+                break
+            self.change_state(changing)
+            due[changing] += self.remaining[changing] + 1
+            changes += len(changing)
+
+            skip = changing[~skipped[changing]]
+            cycles = np.maximum((end - due[skip]) // cycle[skip], 0)
+            due[skip] += cycles * cycle[skip]
+            changes += int(cycles.sum()) * len(PHASES)
+            skipped[skip] = True
+
+        self.remaining = (due - end - 1).astype(np.int32)
+        self.time = end
+        return changes
+
+    def state(self, index):
+        phase = self.phase[index]
+        return PHASES[phase] if phase != DARK else "white"
+
+    def count_by_phase(self):
+        """Number of intersections currently in each phase, keyed by color."""
+        totals = np.bincount(self.phase.astype(np.intp) + 1, minlength=len(PHASES) + 1)
+        return dict(zip(("white",) + PHASES, totals.tolist()))
+
+
+def benchmark(intersections=1000000, ticks=60, seconds=24 * 60 * 60):
+    # Time whole-grid ticks with staggered cycles, without a display
+    engine = TrafficEngine(intersections, start_delay=np.arange(intersections) % 34)
+    started = time.perf_counter()
+    changes = 0
+    for _ in range(ticks):
+        changes += len(engine.tick())
+    elapsed = time.perf_counter() - started
+    print(f"{intersections:,} intersections x {ticks} ticks in {elapsed:.3f} s "
+          f"({intersections * ticks / elapsed:,.0f} intersection-ticks/sec, {changes:,} phase changes)")
+    print(f"Phases now: {engine.count_by_phase()}")
+
+    # The same grid fast-forwarded through a whole day
+    engine = TrafficEngine(intersections, start_delay=np.arange(intersections) % 34)
+    started = time.perf_counter()
+    changes = engine.advance(seconds)
+    elapsed = time.perf_counter() - started
+    print(f"{intersections:,} intersections fast-forwarded {seconds:,} s in {elapsed:.3f} s ({changes:,} phase changes)")
+    print(f"Phases now: {engine.count_by_phase()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the traffic engine without a display.")
+    parser.add_argument("--intersections", type=int, default=1000000)
+    parser.add_argument("--ticks", type=int, default=60, help="seconds to simulate one tick at a time")
+    parser.add_argument("--seconds", type=int, default=24 * 60 * 60, help="seconds to fast-forward")
+    args = parser.parse_args()
+    benchmark(args.intersections, args.ticks, args.seconds)
@@ -0,0 +1,328 @@
+import argparse
+import time
+
+import numpy as np
+
+from traffic_engine import DARK, PHASES, TrafficEngine
+
+RED = PHASES.index("red")
+GREEN = PHASES.index("green")
+WAIT_BINS = 120  # One-second wait histogram bins per intersection; the last one holds every longer wait
+
+
+def per_entry(values, entry):
+    # Street tables hold plain ints when every intersection shares one plan, so no gather is needed
+    return values.take(entry) if isinstance(values, np.ndarray) else values
+
+
+def lookup(table, row, entry, index):
+    # table[row[entry] + index], where row is a plain 0 when every intersection shares one plan
+    return table.take(index + row.take(entry) if isinstance(row, np.ndarray) else index)
+
+
+class Street:
+    """When one street of every intersection can let a vehicle go.
+
+    A street moves on one phase of its signal, one vehicle every
+    1 / saturation_flow seconds counted from the start of that phase. The
+    signal repeats a fixed cycle from its first red (its origin), so the
+    street's chances to discharge come per_cycle times a cycle at fixed
+    offsets. Chances are numbered from 0 at the start of a cycle:
+    first[t] is the first chance at or after t seconds into it and
+    leave[j] the second chance j comes at, for t up to window seconds past
+    one cycle. Intersections with different plans read their own row of
+    each table, as entry-order arrays; with one plan these are plain ints.
+    """
+
+    def __init__(self, phase, rows, plans, plan_of, approaches, saturation_flow, window, capacity):
+        self.phase = phase
+        self.rows = rows
+        phase_start = np.cumsum(plans + 1, axis=1) - (plans + 1)  # Seconds from the origin to each phase
+        offsets = []
+        for plan, start in zip(plans, phase_start[:, phase]):
+            seconds = np.arange(plan[phase] + 1)
+            due = np.floor((seconds + 1) * saturation_flow) > np.floor(seconds * saturation_flow)
+            offsets.append(start + seconds[due])
+        cycle = plans.sum(axis=1) + len(PHASES)
+        per_cycle = np.array([len(o) for o in offsets])
+        if not per_cycle.all():
+            raise ValueError(f"The {PHASES[phase]} phase is too short to let any vehicle go at this saturation_flow.")
+        # A vehicle can queue behind capacity - 1 others, so its chance is at most that many past its first
+        seconds = np.arange(window + cycle.max())
+        first = [seconds // c * m + np.searchsorted(o, seconds % c) for c, m, o in zip(cycle, per_cycle, offsets)]
+        chances = np.arange(max(f[-1] for f in first) + capacity)
+        leave = [chances // m * c + o[chances % m] for c, m, o in zip(cycle, per_cycle, offsets)]
+        self.first, self.leave = np.concatenate(first).astype(np.int32), np.concatenate(leave).astype(np.int32)
+        if len(plans) == 1:
+            self.per_cycle, self.first_row, self.leave_row = int(per_cycle[0]), 0, 0
+        else:
+            plan_of = np.tile(plan_of, approaches)
+            self.per_cycle, self.first_row, self.leave_row = per_cycle[plan_of], plan_of * len(seconds), plan_of * len(chances)
+
+
+class VehicleQueues:
+    """Vehicle queues on every approach of every intersection in a TrafficEngine, with throughput metrics.
+
+    Vehicles arrive on each approach as a seeded Poisson process and queue
+    until their approach has a green, then leave first in, first out, one
+    per approach every 1 / saturation_flow seconds of green (so at most one
+    a second) counted from the start of the green. The first half of the
+    approaches (0 and 1 of the usual 4, the main street) get the signal's
+    green; the rest (the cross street) get theirs while the signal shows
+    red, so the two streets never discharge at once. Each approach stores at most
+    capacity vehicles; arrivals that find it full are counted as blocked.
+
+    The queues follow engine.time, whether it moved by tick() or advance(),
+    but simulate up to BATCH_SECONDS at once: step() only catches up once
+    that much time has built up, and metrics() and queue_lengths() catch up
+    first. As the signals repeat a fixed cycle, each vehicle's first chance
+    to leave is a table lookup (see Street), and in a first-in, first-out
+    queue it leaves on the later of that chance and the one after the
+    vehicle ahead's. A batch's arrivals are drawn at once and sorted by
+    approach and second, so one running maximum over all of them gives
+    every departure, and only approaches that overflow are replayed vehicle
+    by vehicle. The cycle is taken from the engine when the queues are
+    created and checked against it on each catch-up, so signals changed any
+    other way raise RuntimeError.
+
+    Approach a of intersection i is entry a * engine.count + i, so each
+    street is a block of whole rows. max_queue and blocked are kept per
+    approach and summed per intersection only when metrics() is called;
+    waits go straight into a histogram per intersection.
+    """
+
+    BATCH_SECONDS = 60
+
+    def __init__(self, engine, approaches=4, arrival_rate=0.1, saturation_flow=0.5, capacity=32, seed=0):
+        if not 0 < saturation_flow <= 1:
+            raise ValueError("saturation_flow must be between 0 and 1 vehicle per second.")
+        self.engine = engine
+        self.approaches = approaches
+        size = engine.count * approaches
+        rates = np.broadcast_to(np.asarray(arrival_rate, dtype=np.float64), (engine.count, approaches))
+        self.rates = rates.T.ravel()  # arrival_rate is per (intersection, approach); stored in entry order
+        self.max_rate = float(self.rates.max())
+        self.uniform = bool((self.rates == self.max_rate).all())
+        self.capacity = capacity
+        self.rng = np.random.default_rng(seed)
+        self.time = engine.time  # The queues have been simulated up to here
+
+        # Each signal's origin, the start of a red from which it repeats its cycle: the first red for a dark
+        # signal, otherwise the last red start, found by winding the current phase back to its red
+        durations = engine.durations.astype(np.int64)
+        every = np.arange(engine.count)
+        phase = np.maximum(engine.phase, RED)
+        self.phase_end = np.cumsum(durations + 1, axis=1)  # Seconds from the origin to the end of each phase
+        into_cycle = self.phase_end[every, phase] - engine.remaining - 1
+        self.origin = np.where(engine.phase == DARK, engine.time + engine.remaining + 1, engine.time - into_cycle)
+        self.cycle = self.phase_end[:, -1]
+        plans, plan_of = np.unique(durations, axis=0, return_inverse=True)
+        # The main street, the first half of the approaches, moves on the signal's green and the cross street on its red
+        main_approaches = (approaches + 1) // 2
+        self.streets = [Street(phase, rows, plans, plan_of.ravel(), approaches, saturation_flow, self.BATCH_SECONDS, capacity)
+                        for phase, rows in ((GREEN, slice(0, main_approaches)), (RED, slice(main_approaches, approaches)))
+                        if rows.start < rows.stop]
+
+        self.last_chance = np.full(size, -1, dtype=np.int64)  # Chance taken by the last vehicle to join, counted from the origin
+        # Vehicles still queued: approach, departure second and wait. Waits are counted as vehicles join, and
+        # metrics() takes these back out until they have left.
+        self.waiting = (np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32))
+        self.max_queue = np.zeros(size, dtype=np.int32)
+        self.blocked = np.zeros(size, dtype=np.int64)
+        # One-second wait histogram per intersection; entry e's intersection starts at histogram_row[e]. Waits
+        # past the last bin add the rest of their wait to long_waits, so the histogram also gives the total.
+        self.wait_histogram = np.zeros(engine.count * WAIT_BINS, dtype=np.int64)
+        self.long_waits = np.zeros(engine.count, dtype=np.int64)
+        self.histogram_row = np.tile(np.arange(engine.count, dtype=np.int32) * WAIT_BINS, approaches)
+
+    def check_signals(self):
+        # The phase and countdown the fixed cycle gives for now must be the engine's
+        since_origin = self.engine.time - self.origin
+        into_cycle = since_origin % self.cycle
+        phase = (into_cycle[:, None] >= self.phase_end).sum(axis=1)
+        remaining = np.take_along_axis(self.phase_end, phase[:, None], axis=1)[:, 0] - into_cycle - 1
+        dark = since_origin < 0
+        if ((np.where(dark, DARK, phase) != self.engine.phase).any()
+                or (np.where(dark, -since_origin - 1, remaining) != self.engine.remaining).any()):
+            raise RuntimeError("Signals changed outside tick() and advance(); the vehicle queues cannot follow them.")
+
+    def replay(self, entries, first, chance, starts, ends, previous, groups):
+        # Queue the given approaches vehicle by vehicle, turning away arrivals that find the queue full; a
+        # vehicle turned away keeps the chance of the one before it
+        accepted = np.ones(len(first), dtype=bool)
+        for group in groups.tolist():
+            last = int(previous[group])
+            for k in range(starts[group], ends[group]):
+                j = int(first[k])
+                if max(j, last + 1) - j >= self.capacity:
+                    self.blocked[entries[group]] += 1
+                    accepted[k] = False
+                else:
+                    last = max(j, last + 1)
+                chance[k] = last
+        return accepted
+
+    def count_waits(self, histogram, long_waits, approach, wait, step=1):
+        # Add waits to the histogram, or take them out with step -1
+        bins = self.histogram_row.take(approach)
+        if len(wait) and wait.max() >= WAIT_BINS - 1:
+            long = np.flatnonzero(wait > WAIT_BINS - 1)
+            np.add.at(long_waits, approach.take(long) % self.engine.count, step * (wait.take(long) - (WAIT_BINS - 1)))
+            wait = np.minimum(wait, WAIT_BINS - 1)
+        bins += wait
+        np.add.at(histogram, bins, np.int64(step))  # A matching dtype keeps add.at on its fast path
+
+    def queue_street(self, street, approach, second, start, seconds, cycles, into_cycle, dark):
+        # Give every vehicle arriving on one street in the batch its departure, and count its wait
+        if not len(approach):
+            return
+        arrival = into_cycle.take(approach)  # Seconds since the start of the batch's first cycle
+        arrival += second
+        first = lookup(street.first, street.first_row, approach, np.maximum(arrival, 0) if dark else arrival)
+
+        # Vehicle k on an approach takes chance max(first[k], chance[k - 1] + 1): k plus the running maximum of
+        # first - k, started from the chance after the last vehicle queued there. Moving each approach's values
+        # into their own 2**32 band keeps one running maximum from carrying over between approaches, and the
+        # low 32 bits of the result are the value itself.
+        boundary = np.empty(len(approach), dtype=bool)
+        boundary[0] = True
+        np.not_equal(approach[1:], approach[:-1], out=boundary[1:])
+        starts = np.flatnonzero(boundary)
+        ends = np.append(starts[1:], len(approach))
+        entries = approach[starts]
+        chance_base = cycles.take(entries % self.engine.count) * per_entry(street.per_cycle, entries)
+        previous = self.last_chance[entries] - chance_base
+        index = np.arange(len(approach), dtype=np.int32)
+        value = first - index
+        value[starts] = np.maximum(value[starts], previous + 1 - starts)
+        banded = np.left_shift(approach, 32, dtype=np.int64)
+        banded += value
+        np.maximum.accumulate(banded, out=banded)
+        chance = banded.astype(np.int32)
+        chance += index
+
+        queued = chance - first  # Queue length once each vehicle joins
+        queued += 1
+        accepted = None
+        full = np.flatnonzero(queued > self.capacity)
+        if len(full):
+            full = np.unique(np.searchsorted(starts, full, side="right") - 1)
+            accepted = self.replay(entries, first, chance, starts, ends, previous, full)
+            queued = chance - first
+            queued += 1
+        np.maximum.at(self.max_queue, approach, queued)  # Matching dtypes keep this on the fast path
+        self.last_chance[entries] = chance[ends - 1] + chance_base
+
+        wait = lookup(street.leave, street.leave_row, approach, chance)
+        wait -= arrival
+        if accepted is not None:
+            approach, second, wait = approach[accepted], second[accepted], wait[accepted]
+        self.count_waits(self.wait_histogram, self.long_waits, approach, wait)
+        # Keep the vehicles still queued at the end of the batch
+        leave = wait + second
+        still = np.flatnonzero(leave >= seconds)
+        leave = leave.take(still) + start
+        self.waiting = tuple(np.concatenate([waiting, joining])
+                             for waiting, joining in zip(self.waiting, (approach.take(still), leave, wait.take(still))))
+
+    def simulate(self, seconds):
+        # Draw the batch's arrivals over every approach and second at the highest rate, thin them to each
+        # approach's rate, then sort them by approach and second
+        size = len(self.rates)
+        key = self.rng.integers(size * seconds, size=self.rng.poisson(self.max_rate * size * seconds),
+                                dtype=np.int32 if size * seconds < 2 ** 31 else np.int64)
+        if not self.uniform:
+            key = key[self.rng.random(len(key)) * self.max_rate < self.rates[key // seconds]]
+        key.sort()
+        approach = key // seconds  # Much cheaper than divmod
+        second = key - approach * seconds
+        # Whole cycles and seconds into the next from each origin to the batch's start; a dark signal's origin
+        # is still ahead, so its first cycle starts later
+        start = self.time + 1
+        since_origin = start - self.origin
+        cycles, into_cycle = np.divmod(since_origin, self.cycle)
+        dark = since_origin < 0
+        if dark.any():
+            cycles[dark], into_cycle[dark] = 0, since_origin[dark]
+        into_cycle = np.tile(into_cycle.astype(np.int32), self.approaches)
+        for street in self.streets:
+            rows = np.array((street.rows.start, street.rows.stop), dtype=approach.dtype) * self.engine.count
+            lo, hi = np.searchsorted(approach, rows)
+            self.queue_street(street, approach[lo:hi], second[lo:hi], start, seconds, cycles, into_cycle, dark.any())
+        self.time += seconds
+        approach, leave, wait = self.waiting
+        still = np.flatnonzero(leave > self.time)
+        self.waiting = (approach.take(still), leave.take(still), wait.take(still))
+
+    def catch_up(self):
+        """Simulate every second up to engine.time."""
+        end = self.engine.time
+        if end < self.time:
+            raise RuntimeError("The engine's clock went back; the vehicle queues cannot follow it.")
+        if end == self.time:
+            return
+        self.check_signals()
+        while self.time < end:
+            self.simulate(min(end - self.time, self.BATCH_SECONDS))
+
+    def step(self):
+        """Note that the engine has moved on; the seconds are simulated once BATCH_SECONDS have built up."""
+        if not 0 <= self.engine.time - self.time < self.BATCH_SECONDS:
+            self.catch_up()
+
+    def queue_lengths(self):
+        """Vehicles queued on each approach now, as an (approaches, count) array."""
+        self.catch_up()
+        return np.bincount(self.waiting[0], minlength=len(self.rates)).reshape(self.approaches, self.engine.count)
+
+    def metrics(self):
+        """Per-intersection arrays: served, mean_wait and p95_wait (seconds), max_queue and blocked.
+
+        Waits cover the vehicles served so far; the p95 is read from the
+        one-second histogram, so waits of WAIT_BINS - 1 seconds or more
+        report as that value. Intersections that served no one get 0.
+        """
+        self.catch_up()
+        histogram, long_waits = self.wait_histogram.copy(), self.long_waits.copy()
+        approach, _, wait = self.waiting  # Counted already, but not served yet
+        self.count_waits(histogram, long_waits, approach, wait, step=-1)
+        histogram = histogram.reshape(self.engine.count, WAIT_BINS)
+        shape = (self.approaches, self.engine.count)
+        total_wait = histogram @ np.arange(WAIT_BINS) + long_waits
+        cumulative = histogram.cumsum(axis=1)
+        served = cumulative[:, -1]  # Every vehicle served has one wait in the histogram
+        p95 = (cumulative < np.ceil(0.95 * served)[:, None]).sum(axis=1)
+        return {"served": served, "mean_wait": np.where(served > 0, total_wait / np.maximum(served, 1), 0.0),
+                "p95_wait": np.where(served > 0, p95, 0), "max_queue": self.max_queue.reshape(shape).max(axis=0),
+                "blocked": self.blocked.reshape(shape).sum(axis=0)}
+
+
+def benchmark(intersections=100000, seconds=3600):
+    # Time the queue model against the engine tick it runs alongside, without a display
+    engine = TrafficEngine(intersections, start_delay=np.arange(intersections) % 34)
+    queues = VehicleQueues(engine)
+    tick_time = step_time = 0.0
+    for _ in range(seconds):
+        started = time.perf_counter()
+        engine.tick()
+        ticked = time.perf_counter()
+        queues.step()
+        tick_time += ticked - started
+        step_time += time.perf_counter() - ticked
+
+    started = time.perf_counter()
+    metrics = queues.metrics()
+    metrics_time = time.perf_counter() - started
+    print(f"{intersections:,} intersections x {queues.approaches} approaches, {seconds:,} s simulated")
+    print(f"Engine ticks: {tick_time:.2f} s   queue steps: {step_time:.2f} s   metrics: {metrics_time * 1000:.0f} ms")
+    print(f"Served {int(metrics['served'].sum()):,} vehicles, mean wait "
+          f"{metrics['mean_wait'].mean():.1f} s, median p95 wait {np.median(metrics['p95_wait']):.0f} s, "
+          f"worst max queue {int(metrics['max_queue'].max())}, blocked {int(metrics['blocked'].sum()):,}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the vehicle queue model without a display.")
+    parser.add_argument("--intersections", type=int, default=100000)
+    parser.add_argument("--seconds", type=int, default=3600)
+    args = parser.parse_args()
+    benchmark(args.intersections, args.seconds)